@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Compares the storage codecs on file size, save time and load time.
+
+Usage: python3 -m benchmarks.bench_codecs [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.serializers import codecs, open_file  # noqa: E402
+
+
+def records(count):
+    """Returns a {key: record} store of count Place records."""
+    stamp = "2024-05-20T01:15:24.620773"
+    result = {}
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        result["Place." + obj_id] = {
+            "id": obj_id, "created_at": stamp, "updated_at": stamp, "__class__": "Place",
+            "name": "Place {}".format(i), "city_id": "c", "user_id": "u",
+            "number_rooms": i % 5, "price_by_night": i % 300,
+            "latitude": 37.77, "longitude": -122.41, "amenity_ids": ["a", "b"]}
+    return result
+
+
+def main():
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    print("{:>9} {:<8} {:>10} {:>9} {:>9}".format("objects", "codec", "MiB", "save s", "load s"))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in map(int, args.sizes.split(",")):
+            data = records(size)
+            for name, codec in codecs.items():
+                path = os.path.join(directory, "store." + name)
+                start = time.perf_counter()
+                with open_file(path, "w", codec) as file:
+                    codec.dump(data, file)
+                saved = time.perf_counter() - start
+                start = time.perf_counter()
+                with open_file(path, "r", codec) as file:
+                    codec.load(file)
+                loaded = time.perf_counter() - start
+                print("{:>9,} {:<8} {:>10.1f} {:>9.3f} {:>9.3f}".format(
+                    size, name, os.path.getsize(path) / 2 ** 20, saved, loaded))
+
+
+if __name__ == "__main__":
+    main()
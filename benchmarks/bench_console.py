@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""Benchmarks console argument parsing and batch command throughput.
+
+Usage: python3 -m benchmarks.bench_console [--count N]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from shlex import split
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import console  # noqa: E402
+from models import storage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def legacy_parse(arguments):
+    """Parses arguments the way the console did before: regex and shlex per line."""
+    braces_content = re.search(r"\{(.*?)\}", arguments)
+    brackets_content = re.search(r"\[(.*?)\]", arguments)
+    if braces_content is None:
+        if brackets_content is None:
+            return [token.strip(",") for token in split(arguments)]
+        lexer = split(arguments[:brackets_content.span()[0]])
+        token_list = [token.strip(",") for token in lexer]
+        token_list.append(brackets_content.group())
+        return token_list
+    lexer = split(arguments[:braces_content.span()[0]])
+    token_list = [token.strip(",") for token in lexer]
+    token_list.append(braces_content.group())
+    return token_list
+
+
+def commands(ids):
+    """Returns a mix of show, update and count commands over the given Place ids."""
+    lines = []
+    for i, obj_id in enumerate(ids):
+        lines.append("show Place {}".format(obj_id))
+        lines.append('Place.update("{}", "name", "Place {}")'.format(obj_id, i))
+        lines.append('Place.update("{}", {{"max_guest": {}}})'.format(obj_id, i % 8))
+        lines.append("Place.count()")
+    return lines
+
+
+def timed(label, function, count):
+    """Runs function once and prints its duration and rate."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print("{:<28} {:8.3f}s  {:>12,.0f}/s".format(label, elapsed, count / elapsed))
+    return elapsed
+
+
+def run_batch(lines):
+    """Runs lines through HBNBCommand.run_batch with output discarded."""
+    with open(os.devnull, "w") as devnull, patch("sys.stdout", new=devnull):
+        console.HBNBCommand().run_batch(lines, report=devnull)
+
+
+def bench(count):
+    """Times parsing and run_batch over count places."""
+    with storage.batch():
+        ids = [Place().id for _ in range(count)]
+    lines = commands(ids)
+    arguments = [console.METHOD_CALL.match(line) for line in lines]
+    arguments = ["Place " + match.group(3) if match else line[5:]
+                 for match, line in zip(arguments, lines)]
+
+    print("{:,} commands".format(len(lines)))
+    slow = timed("legacy parse", lambda: [legacy_parse(a) for a in arguments], len(lines))
+    console.parse_tokens.cache_clear()
+    fast = timed("parse (cold cache)", lambda: [console.parse(a) for a in arguments], len(lines))
+    timed("parse (warm cache)", lambda: [console.parse(a) for a in arguments], len(lines))
+    print("parse speedup: {:.1f}x".format(slow / fast))
+    with patch("console.parse", legacy_parse):
+        slow = timed("run_batch, legacy parse", lambda: run_batch(lines), len(lines))
+    console.parse_tokens.cache_clear()
+    fast = timed("run_batch", lambda: run_batch(lines), len(lines))
+    print("batch speedup: {:.1f}x".format(slow / fast))
+
+
+def main():
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        storage.configure(file_path=os.path.join(directory, "file.json"))
+        bench(args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Benchmarks datetime parsing and BaseModel hydration from stored records.
+
+Usage: python3 -m benchmarks.bench_datetime [--count N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base_model import BaseModel, parse_datetime  # noqa: E402
+
+
+def records(count):
+    """Returns count serialized BaseModel records; every tenth has no microseconds."""
+    start = datetime(2024, 5, 20, 1, 15, 24, 620773)
+    result = []
+    for i in range(count):
+        stamp = (start + timedelta(seconds=i, microseconds=0 if i % 10 == 0 else i)).isoformat()
+        result.append({"id": str(i), "created_at": stamp, "updated_at": stamp,
+                       "__class__": "BaseModel"})
+    return result
+
+
+def strptime_tolerant(value):
+    """Parses value the way BaseModel did before, plus the format without microseconds."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
+
+
+def timed(label, function, count):
+    """Runs function once and prints its duration and rate."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print("{:<28} {:8.3f}s  {:>12,.0f}/s".format(label, elapsed, count / elapsed))
+    return elapsed
+
+
+def main():
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+    data = records(args.count)
+    stamps = [record["created_at"] for record in data]
+
+    print("{:,} records".format(args.count))
+    slow = timed("strptime", lambda: [strptime_tolerant(s) for s in stamps], args.count)
+    fast = timed("parse_datetime", lambda: [parse_datetime(s) for s in stamps], args.count)
+    print("parse speedup: {:.1f}x".format(slow / fast))
+    timed("BaseModel(**record)", lambda: [BaseModel(**r) for r in data], args.count)
+    objects = [BaseModel(**r) for r in data[:args.count]]
+    timed("to_dict()", lambda: [obj.to_dict() for obj in objects], args.count)
+
+
+if __name__ == "__main__":
+    main()
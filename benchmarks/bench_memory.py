@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Measures the memory held by stored objects, regular versus compact.
+
+Usage: python3 -m benchmarks.bench_memory [--count N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.compact import compact_class  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def records(count):
+    """Returns count serialized records spread over User, Place and Review."""
+    stamp = "2024-05-20T01:15:24.620773"
+    result = []
+    for i in range(count):
+        record = {"id": str(uuid.uuid4()), "created_at": stamp, "updated_at": stamp}
+        if i % 3 == 0:
+            record.update(__class__="User", email="user{}@hbnb.io".format(i),
+                          first_name="Betty", last_name="Holberton")
+        elif i % 3 == 1:
+            record.update(__class__="Place", name="Place {}".format(i), city_id="c",
+                          user_id="u", number_rooms=i % 5, price_by_night=i % 300,
+                          latitude=37.77, longitude=-122.41)
+        else:
+            record.update(__class__="Review", place_id="p", user_id="u", text="Great stay")
+        result.append(record)
+    return result
+
+
+def measure(classes, data):
+    """Returns the bytes allocated to build data with classes."""
+    tracemalloc.start()
+    objects = [classes[record["__class__"]](**record) for record in data]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def main():
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=300000)
+    args = parser.parse_args()
+    data = records(args.count)
+    regular = {cls.__name__: cls for cls in (User, Place, Review)}
+    compact = {name: compact_class(cls) for name, cls in regular.items()}
+
+    print("{:,} objects".format(args.count))
+    sizes = {}
+    for label, classes in (("regular", regular), ("compact", compact)):
+        sizes[label] = measure(classes, data)
+        print("{:<8} {:10.1f} MiB  {:6.0f} B/object".format(
+            label, sizes[label] / 2 ** 20, sizes[label] / args.count))
+    print("saved: {:.0%}".format(1 - sizes["compact"] / sizes["regular"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+"""Times the storage and console hot paths over synthetic datasets.
+
+Each case runs --repeat times per dataset size; the best time is kept,
+and one more run under tracemalloc records the peak memory. Results are
+written as a JSON report which a later run can be compared against.
+
+Usage: python3 -m benchmarks.bench_storage [--sizes 1000,10000]
+       [--repeat 3] [--output report.json] [--baseline report.json]
+       [--threshold 0.25] [--report report.json]
+
+With --baseline, cases slower than the baseline by more than threshold
+are reported and the exit status is 1. --report compares an existing
+report instead of running the cases.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import console  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.serializers import codecs, open_file  # noqa: E402
+
+
+def dataset(count, seed=0):
+    """Returns a {key: record} store of about count linked records.
+
+    States hold cities, users own places, places get reviews; the
+    proportions roughly follow a populated HBnB store.
+    """
+    rand = random.Random(seed)
+    stamp = "2024-05-20T01:15:24.620773"
+    store = {}
+
+    def add(cls, **attributes):
+        obj_id = str(uuid.UUID(int=rand.getrandbits(128), version=4))
+        store["{}.{}".format(cls, obj_id)] = dict(
+            attributes, id=obj_id, created_at=stamp, updated_at=stamp, __class__=cls)
+        return obj_id
+
+    states = [add("State", name="State {}".format(i)) for i in range(max(1, count // 100))]
+    cities = [add("City", name="City {}".format(i), state_id=rand.choice(states))
+              for i in range(max(1, count // 20))]
+    amenities = [add("Amenity", name="Amenity {}".format(i)) for i in range(20)]
+    users = [add("User", email="user{}@hbnb.io".format(i), password="pwd",
+                 first_name="Betty", last_name="Holberton")
+             for i in range(max(1, count // 5))]
+    places = [add("Place", name="Place {}".format(i), city_id=rand.choice(cities),
+                  user_id=rand.choice(users), description="A nice place",
+                  number_rooms=i % 5, number_bathrooms=i % 3, max_guest=i % 8,
+                  price_by_night=i % 300, latitude=rand.uniform(-90, 90),
+                  longitude=rand.uniform(-180, 180),
+                  amenity_ids=rand.sample(amenities, 3))
+              for i in range(max(1, count // 4))]
+    while len(store) < count:
+        add("Review", place_id=rand.choice(places), user_id=rand.choice(users),
+            text="Great stay")
+    return store
+
+
+def script(keys, count):
+    """Returns count console lines mixing show, update and count commands."""
+    places = [key.split(".", 1)[1] for key in keys if key.startswith("Place.")]
+    users = [key.split(".", 1)[1] for key in keys if key.startswith("User.")]
+    lines = []
+    for i in range(count):
+        place_id = places[i % len(places)]
+        lines.append(("show Place {}".format(place_id),
+                      'Place.update("{}", "max_guest", {})'.format(place_id, i % 8),
+                      "State.count()",
+                      'User.show("{}")'.format(users[i % len(users)]))[i % 4])
+    return lines
+
+
+def cases(keys, commands):
+    """Returns the (name, function) cases; each function returns its operation count."""
+    rand = random.Random(1)
+    sample = rand.sample(keys, min(len(keys), 10000))
+    pairs = [key.split(".", 1) for key in sample]
+    centers = [(rand.uniform(-60, 60), rand.uniform(-180, 180)) for _ in range(1000)]
+    cmd = console.HBNBCommand()
+
+    def save():
+        storage.save()
+        return 1
+
+    def reload():
+        storage.reload()
+        return len(keys)
+
+    def to_dict():
+        for obj in storage.objects():
+            obj.to_dict()
+        return len(keys)
+
+    def get():
+        for name, obj_id in pairs:
+            storage.get(name, obj_id)
+        return len(pairs)
+
+    def near():
+        for latitude, longitude in centers:
+            storage.places_near(latitude, longitude, 25)
+        return len(centers)
+
+    def do_all():
+        cmd.onecmd("all Place")
+        return storage.count("Place")
+
+    def do_count():
+        for name in storage.classes():
+            cmd.onecmd("count {}".format(name))
+        return len(storage.classes())
+
+    def onecmd():
+        for line in commands:
+            cmd.onecmd(cmd.precmd(line))
+        return len(commands)
+
+    return [("reload", reload), ("save", save), ("to_dict", to_dict), ("get", get),
+            ("near", near), ("do_all", do_all), ("do_count", do_count), ("onecmd", onecmd)]
+
+
+def measure(function, repeat, memory=True):
+    """Returns the best seconds, the operation count and the peak bytes of function."""
+    best, ops = None, 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ops = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                function()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return best, ops, peak
+
+
+def run(sizes, repeat, commands, codec, memory=True):
+    """Runs every case at every size and returns the report."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, "file.json")
+            store = dataset(size)
+            with open_file(path, "w", codecs[codec]) as file:
+                codecs[codec].dump(store, file)
+            storage.configure(file_path=path, codec=codec, durability="none")
+            storage.reload()
+            keys = list(store)
+            del store
+            for name, function in cases(keys, script(keys, commands)):
+                seconds, ops, peak = measure(function, repeat, memory)
+                results.append({"case": name, "size": size, "seconds": seconds,
+                                "ops": ops, "rate": ops / seconds if seconds else None,
+                                "peak_bytes": peak})
+                print("{:<9} {:>9,} {:9.4f}s {:>13,.0f}/s {:>9}".format(
+                    name, size, seconds, ops / seconds if seconds else 0,
+                    "-" if peak is None else "{:.1f} MiB".format(peak / 2 ** 20)),
+                    file=sys.stderr)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"sizes": sizes, "repeat": repeat, "commands": commands, "codec": codec},
+        "results": results
+    }
+
+
+def compare(report, baseline, threshold):
+    """Prints report against baseline and returns the regressed cases."""
+    previous = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print("{:<9} {:>9} {:>10} {:>10} {:>8} {:>8}".format(
+        "case", "size", "base s", "now s", "time", "memory"))
+    for result in report["results"]:
+        old = previous.get((result["case"], result["size"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        memory = "-"
+        if result.get("peak_bytes") and old.get("peak_bytes"):
+            memory = "{:+.0%}".format(result["peak_bytes"] / old["peak_bytes"] - 1)
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(result)
+            flag = "  REGRESSION"
+        print("{:<9} {:>9,} {:10.4f} {:10.4f} {:>+8.0%} {:>8}{}".format(
+            result["case"], result["size"], old["seconds"], result["seconds"],
+            ratio - 1, memory, flag))
+    return regressions
+
+
+def main():
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--commands", type=int, default=200,
+                        help="console lines of the onecmd case")
+    parser.add_argument("--codec", default="json", choices=sorted(codecs))
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown ratio counted as a regression")
+    parser.add_argument("--report", help="compare this JSON report instead of running")
+    args = parser.parse_args()
+    if args.report:
+        with open(args.report, "r", encoding="utf-8") as file:
+            report = json.load(file)
+    else:
+        report = run([int(size) for size in args.sizes.split(",")], args.repeat,
+                     args.commands, args.codec, not args.no_memory)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
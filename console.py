@@ -1,35 +1,94 @@
 #!/usr/bin/python3
 """Defines the HBnB console interface."""
+import argparse
+import ast
+import cProfile
 import cmd
+import json
+import pstats
 import re
+import sys
+import time
+import tracemalloc
+from functools import lru_cache
+from itertools import islice
 from shlex import split
 from models import storage
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.engine.geo import distance_km
+from models.engine.metrics import metrics
+from models.relations import dependents, tree
+
+
+BRACES = re.compile(r"\{(.*?)\}")
+BRACKETS = re.compile(r"\[(.*?)\]")
+SIMPLE_ARGUMENTS = re.compile(
+    r"""\s*(?:(?:"[^"\\]*",*|'[^'\\]*',*|[^\s"'\\]+)(?:\s+|$))*""")
+SIMPLE_TOKEN = re.compile(r"""\"([^"\\]*)\"(,*)|'([^'\\]*)'(,*)|([^\s"'\\]+)""")
+METHOD_CALL = re.compile(r"([^.]*)\.(\w+)\((.*)\)\s*$")
+
+
+def split_tokens(text):
+    """Split text like shlex.split, with a fast path for simple quoting.
+
+    Whitespace-separated words and plain "..." or '...' strings, the
+    shapes console commands nearly always have, are read with one
+    precompiled pattern; anything else goes through shlex.
+    """
+    if SIMPLE_ARGUMENTS.fullmatch(text):
+        return ["".join(groups) for groups in SIMPLE_TOKEN.findall(text)]
+    return split(text)
+
+
+@lru_cache(maxsize=4096)
+def parse_tokens(arguments):
+    """Parse the input arguments into a tuple of tokens, memoized."""
+    literal = BRACES.search(arguments) or BRACKETS.search(arguments)
+    if literal is None:
+        return tuple(token.strip(",") for token in split_tokens(arguments))
+    tokens = [token.strip(",") for token in split_tokens(arguments[:literal.start()])]
+    tokens.append(literal.group())
+    return tuple(tokens)
 
 
 def parse(arguments):
-    """Parse the input arguments and return a list of tokens."""
-    braces_content = re.search(r"\{(.*?)\}", arguments)
-    brackets_content = re.search(r"\[(.*?)\]", arguments)
-    if braces_content is None:
-        if brackets_content is None:
-            return [token.strip(",") for token in split(arguments)]
-        else:
-            lexer = split(arguments[:brackets_content.span()[0]])
-            token_list = [token.strip(",") for token in lexer]
-            token_list.append(brackets_content.group())
-            return token_list
-    else:
-        lexer = split(arguments[:braces_content.span()[0]])
-        token_list = [token.strip(",") for token in lexer]
-        token_list.append(braces_content.group())
-        return token_list
+    """Parse the input arguments and return a list of tokens.
+
+    A {...} dictionary or, failing that, a [...] list is kept as a single
+    raw token at the end of the list; text after it is ignored.
+    """
+    return list(parse_tokens(arguments))
+
+
+def parse_literal(text):
+    """Safely evaluate a Python literal, returning None if it is not one."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+
+
+def parse_call(arguments):
+    """Parse call arguments "a, b, name=c" into a list and a dict of literals."""
+    call = ast.parse("f({})".format(arguments), mode="eval").body
+    values = [ast.literal_eval(node) for node in call.args]
+    keywords = {}
+    for keyword in call.keywords:
+        if keyword.arg is None:
+            raise ValueError("arguments must be named")
+        keywords[keyword.arg] = ast.literal_eval(keyword.value)
+    return values, keywords
+
+
+def parse_conditions(arguments):
+    """Parse "attr=value, ..." or a dict literal into a dict of literal values."""
+    values, keywords = parse_call(arguments)
+    conditions = {}
+    for value in values:
+        if not isinstance(value, dict):
+            raise ValueError("conditions must be a dictionary")
+        conditions.update(value)
+    conditions.update(keywords)
+    return conditions
 
 
 class HBNBCommand(cmd.Cmd):
@@ -54,23 +113,46 @@ class HBNBCommand(cmd.Cmd):
         """Override default behavior to do nothing on empty input."""
         pass
 
+    __methods = {
+        "all": "do_all",
+        "show": "do_show",
+        "destroy": "do_destroy",
+        "count": "do_count",
+        "update": "do_update",
+        "where": "do_where",
+        "create_many": "do_create_many",
+        "update_where": "do_update_where",
+        "destroy_where": "do_destroy_where",
+        "tree": "do_tree",
+        "near": "do_near",
+        "within": "do_within"
+    }
+
+    def onecmd(self, line):
+        """Run one command line, timing its handler when metrics are enabled."""
+        if not metrics.enabled:
+            return super().onecmd(line)
+        with metrics.timer("console." + self.__handler(line)):
+            return super().onecmd(line)
+
+    def __handler(self, line):
+        """Return the name of the method that runs line."""
+        command = self.parseline(line)[0]
+        if command and hasattr(self, "do_" + command):
+            return "do_" + command
+        match = METHOD_CALL.match(line.strip())
+        if match and match.group(2) in HBNBCommand.__methods:
+            return HBNBCommand.__methods[match.group(2)]
+        return "default"
+
     def default(self, line):
-        """Handle unrecognized commands."""
-        command_map = {
-            "all": self.do_all,
-            "show": self.do_show,
-            "destroy": self.do_destroy,
-            "count": self.do_count,
-            "update": self.do_update
-        }
-        match = re.search(r"\.", line)
+        """Handle unrecognized commands, such as <class>.<method>(<args>)."""
+        match = METHOD_CALL.match(line)
         if match:
-            class_name, method_call = line[:match.span()[0]], line[match.span()[1]:]
-            match = re.search(r"\((.*?)\)", method_call)
-            if match:
-                method_name, method_args = method_call[:match.span()[0]], match.group()[1:-1]
-                if method_name in command_map:
-                    return command_map[method_name]("{} {}".format(class_name, method_args))
+            class_name, method_name, method_args = match.groups()
+            if method_name in HBNBCommand.__methods:
+                command = getattr(self, HBNBCommand.__methods[method_name])
+                return command("{} {}".format(class_name, method_args))
         print("*** Unknown syntax: {}".format(line))
         return False
 
@@ -91,63 +173,383 @@ class HBNBCommand(cmd.Cmd):
         elif args[0] not in HBNBCommand.__classes:
             print("** class doesn't exist **")
         else:
-            new_instance = eval(args[0])()
+            new_instance = storage.classes()[args[0]]()
             print(new_instance.id)
             storage.save()
 
+    def do_create_many(self, arg):
+        """Create many instances of a class with the same attributes.
+
+        Usage: <class>.create_many(n, {"attr": value}) or
+        <class>.create_many(n, attr=value); the new ids are printed one
+        per line and everything is saved with a single write.
+        """
+        class_name, arguments = self.__split_class(arg)
+        if class_name is None:
+            return False
+        try:
+            values, attributes = parse_call(arguments)
+            count, *dicts = values
+            for value in dicts:
+                attributes.update(value)
+            attributes = self.__cast(class_name, attributes)
+        except (SyntaxError, ValueError, TypeError):
+            print("** invalid arguments **")
+            return False
+        if not isinstance(count, int) or count < 0:
+            print("** invalid count **")
+            return False
+        records = ({name: list(value) if isinstance(value, list) else value
+                    for name, value in attributes.items()} for _ in range(count))
+        for obj in storage.bulk_insert(class_name, records):
+            print(obj.id)
+
     def do_show(self, arg):
         """Show the string representation of an instance based on class and id."""
         args = parse(arg)
-        obj_dict = storage.all()
         if not args:
             print("** class name missing **")
         elif args[0] not in HBNBCommand.__classes:
             print("** class doesn't exist **")
         elif len(args) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(args[0], args[1]) not in obj_dict:
+        elif storage.get(args[0], args[1]) is None:
             print("** no instance found **")
         else:
-            print(obj_dict["{}.{}".format(args[0], args[1])])
+            print(storage.get(args[0], args[1]))
 
     def do_destroy(self, arg):
-        """Delete an instance based on class and id."""
+        """Delete an instance based on class and id.
+
+        Usage: destroy <class> <id> [--cascade]; --cascade also deletes
+        the objects that depend on the instance, such as the cities of a
+        state with their places and reviews, in a single write.
+        """
         args = parse(arg)
-        obj_dict = storage.all()
+        cascade = "--cascade" in args
+        args = [token for token in args if token != "--cascade"]
         if not args:
             print("** class name missing **")
         elif args[0] not in HBNBCommand.__classes:
             print("** class doesn't exist **")
         elif len(args) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(args[0], args[1]) not in obj_dict:
+        elif storage.get(args[0], args[1]) is None:
             print("** no instance found **")
+        elif cascade:
+            instance = storage.get(args[0], args[1])
+            storage.bulk_delete([instance] + dependents(instance))
         else:
-            del obj_dict["{}.{}".format(args[0], args[1])]
+            storage.delete(storage.get(args[0], args[1]))
             storage.save()
 
+    def do_tree(self, arg):
+        """Show an instance as JSON with its related objects nested.
+
+        Usage: tree <class> <id> [depth] or <class>.tree(<id>, <depth>);
+        each level adds the objects referring to the one above, such as
+        the cities of a state, then their places (depth 1 by default).
+        """
+        args = parse(arg)
+        if not args:
+            print("** class name missing **")
+        elif args[0] not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print("** instance id missing **")
+        elif len(args) > 2 and not args[2].isdigit():
+            print("** invalid depth **")
+        elif storage.get(args[0], args[1]) is None:
+            print("** no instance found **")
+        else:
+            depth = int(args[2]) if len(args) > 2 else 1
+            print(json.dumps(tree(storage.get(args[0], args[1]), depth)))
+
+    def do_near(self, arg):
+        """Show the places within a distance of a point, nearest first.
+
+        Usage: near <latitude> <longitude> <radius_km> [limit] or
+        Place.near(<latitude>, <longitude>, <radius_km>); each place is
+        printed after its distance in km.
+        """
+        values = self.__numbers(arg, 3, 4)
+        if values is None:
+            return False
+        latitude, longitude, radius = values[:3]
+        limit = int(values[3]) if len(values) > 3 else None
+        for place in storage.places_near(latitude, longitude, radius, limit):
+            print("{:.3f} {}".format(
+                distance_km(latitude, longitude, place.latitude, place.longitude), place))
+
+    def do_within(self, arg):
+        """Show the places inside a latitude/longitude box.
+
+        Usage: within <south> <west> <north> <east> or
+        Place.within(<south>, <west>, <north>, <east>); a west edge east
+        of the east one crosses the antimeridian.
+        """
+        values = self.__numbers(arg, 4, 4)
+        if values is None:
+            return False
+        for place in storage.places_within(*values):
+            print(place)
+
+    @staticmethod
+    def __numbers(arg, least, most):
+        """Return the numbers of a near or within command, or None after an error."""
+        args = parse(arg)
+        if args and args[0] == "Place":
+            args = args[1:]
+        elif args and args[0] in HBNBCommand.__classes:
+            print("** only places have a location **")
+            return None
+        try:
+            values = [float(token) for token in args]
+        except ValueError:
+            values = []
+        if not least <= len(values) <= most:
+            print("** invalid coordinates **")
+            return None
+        return values
+
     def do_all(self, arg):
-        """Show all instances, or all instances of a class."""
+        """Show all instances, or all instances of a class.
+
+        Usage: all [<class>] [--stream] [--json] [--offset N] [--limit N]
+        --stream prints one instance per line as it is read instead of a
+        list, --json prints one JSON object per line (NDJSON), and
+        --offset/--limit page through the instances.
+        """
         args = parse(arg)
-        if args and args[0] not in HBNBCommand.__classes:
+        options = {"--stream": False, "--json": False, "--offset": 0, "--limit": None}
+        class_names = []
+        tokens = iter(args)
+        for token in tokens:
+            if token in ("--stream", "--json"):
+                options[token] = True
+            elif token in ("--offset", "--limit"):
+                value = next(tokens, "")
+                if not value.isdigit():
+                    print("** invalid {} value **".format(token[2:]))
+                    return False
+                options[token] = int(value)
+            else:
+                class_names.append(token)
+        if class_names and class_names[0] not in HBNBCommand.__classes:
             print("** class doesn't exist **")
+            return False
+        objects = storage.objects(class_names[0] if class_names else None)
+        offset, limit = options["--offset"], options["--limit"]
+        if offset or limit is not None:
+            objects = islice(objects, offset, None if limit is None else offset + limit)
+        if options["--json"]:
+            for obj in objects:
+                print(json.dumps(obj.to_dict()))
+        elif options["--stream"]:
+            for obj in objects:
+                print(obj)
         else:
-            instances = []
-            for obj in storage.all().values():
-                if not args or args[0] == obj.__class__.__name__:
-                    instances.append(str(obj))
-            print(instances)
+            print([str(obj) for obj in objects])
 
     def do_count(self, arg):
         """Count the number of instances of a class."""
         args = parse(arg)
-        count = sum(1 for obj in storage.all().values() if args[0] == obj.__class__.__name__)
-        print(count)
+        print(storage.count(args[0]))
+
+    def do_cache(self, arg):
+        """Show the object cache statistics of a lazy store.
+
+        Usage: cache; the cache size is set with HBNB_STORAGE_CACHE.
+        """
+        stats = storage.cache_stats()
+        if stats is None:
+            print("** no object cache **")
+            return False
+        for name, value in stats.items():
+            print("{}: {}".format(name, round(value, 3) if isinstance(value, float) else value))
+
+    def do_stats(self, arg):
+        """Show the call counts and latencies of storage and console operations.
+
+        Usage: stats [on|off|reset|--json]; nothing is recorded until
+        metrics are turned on, here, with --metrics FILE or with
+        HBNB_METRICS=FILE, the last two also dumping them to FILE on exit.
+        """
+        args = parse(arg)
+        if args and args[0] in ("on", "off"):
+            metrics.enable(args[0] == "on")
+            return False
+        if args and args[0] == "reset":
+            metrics.reset()
+            return False
+        snapshot = metrics.snapshot()
+        if args and args[0] == "--json":
+            print(json.dumps(snapshot))
+            return False
+        if not metrics.enabled and not snapshot["timers"]:
+            print("** metrics are off **")
+            return False
+        bounds = "/".join("{:g}".format(bound * 1000) for bound in metrics.buckets)
+        print("{:<24}{:>8}{:>12}{:>10}{:>10}  calls <= {}/more ms".format(
+            "timer", "calls", "total ms", "mean ms", "max ms", bounds))
+        for name, timer in snapshot["timers"].items():
+            print("{:<24}{:>8}{:>12.1f}{:>10.3f}{:>10.3f}  {}".format(
+                name, timer["calls"], timer["total_ms"], timer["mean_ms"], timer["max_ms"],
+                "/".join(map(str, timer["histogram"].values()))))
+        for name, value in list(snapshot["counters"].items()) + list(snapshot["gauges"].items()):
+            print("{}: {}".format(name, value))
+
+    def do_profile(self, arg):
+        """Run one command under cProfile, or tracemalloc with --memory.
+
+        Usage: profile [--memory] [--limit N] <command>; prints the N
+        (20) functions with the most cumulative time, or the N source
+        lines that allocated the most memory and the peak.
+        """
+        memory, limit = False, 20
+        command = arg.strip()
+        while command.startswith("--"):
+            option, _, command = command.partition(" ")
+            command = command.strip()
+            if option == "--memory":
+                memory = True
+            elif option == "--limit":
+                value, _, command = command.partition(" ")
+                if not value.isdigit():
+                    print("** invalid limit value **")
+                    return False
+                limit = int(value)
+            else:
+                print("** unknown option: {} **".format(option))
+                return False
+        if not command:
+            print("** command missing **")
+            return False
+        if memory:
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            try:
+                stop = self.onecmd(command)
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            for statistic in snapshot.statistics("lineno")[:limit]:
+                print(statistic)
+            print("peak: {:.1f} KiB".format(peak / 1024))
+        else:
+            profiler = cProfile.Profile()
+            stop = profiler.runcall(self.onecmd, command)
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(limit)
+        return stop
+
+    def do_where(self, arg):
+        """Show the instances of a class matching attribute conditions.
+
+        Usage: <class>.where(attr=value, attr__lt=value, order_by="-attr",
+        limit=n, offset=n); operators are eq, ne, lt, le, gt, ge, in and
+        contains. Matches are printed one per line as they are found.
+        """
+        class_name, _, arguments = arg.strip().partition(" ")
+        if not class_name:
+            print("** class name missing **")
+            return False
+        if class_name not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+            return False
+        try:
+            conditions = parse_conditions(arguments)
+            order_by = conditions.pop("order_by", ())
+            limit = conditions.pop("limit", None)
+            offset = conditions.pop("offset", 0)
+            if isinstance(order_by, str):
+                order_by = (order_by,)
+            if not isinstance(order_by, (list, tuple)) or \
+                    not all(isinstance(name, str) for name in order_by):
+                raise ValueError("order_by must be attribute names")
+            for count in (limit, offset):
+                if count is not None and (type(count) is not int or count < 0):
+                    raise ValueError("limit and offset must be non-negative integers")
+            query = storage.query(class_name).where(**conditions)
+        except (SyntaxError, ValueError):
+            print("** invalid conditions **")
+            return False
+        if order_by:
+            query = query.order_by(*order_by)
+        if limit is not None:
+            query = query.limit(limit)
+        for obj in query.offset(offset):
+            print(obj)
+
+    def do_update_where(self, arg):
+        """Update the instances of a class matching attribute conditions.
+
+        Usage: <class>.update_where({conditions}, {"attr": value}); the
+        conditions are those of where. Prints the number of instances
+        updated, saved with a single write.
+        """
+        class_name, arguments = self.__split_class(arg)
+        if class_name is None:
+            return False
+        try:
+            values, keywords = parse_call(arguments)
+            conditions, attributes = values
+            if keywords or not isinstance(conditions, dict) or \
+                    not isinstance(attributes, dict):
+                raise ValueError("expected two dictionaries")
+            query = storage.query(class_name).where(**conditions)
+            attributes = self.__cast(class_name, attributes)
+        except (SyntaxError, ValueError, TypeError):
+            print("** invalid arguments **")
+            return False
+        print(storage.bulk_update(query.all(), attributes))
+
+    def do_destroy_where(self, arg):
+        """Delete the instances of a class matching attribute conditions.
+
+        Usage: <class>.destroy_where({conditions}) or
+        <class>.destroy_where(attr=value); the conditions are those of
+        where. Prints the number of instances deleted, saved with a
+        single write.
+        """
+        class_name, arguments = self.__split_class(arg)
+        if class_name is None:
+            return False
+        try:
+            query = storage.query(class_name).where(**parse_conditions(arguments))
+        except (SyntaxError, ValueError):
+            print("** invalid conditions **")
+            return False
+        print(storage.bulk_delete(query.all()))
+
+    @staticmethod
+    def __split_class(arg):
+        """Split arg into a valid class name and the rest, or print why not."""
+        class_name, _, arguments = arg.strip().partition(" ")
+        if not class_name:
+            print("** class name missing **")
+        elif class_name not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+        else:
+            return class_name, arguments
+        return None, arguments
+
+    @staticmethod
+    def __cast(class_name, attributes):
+        """Cast attribute values to the str, int or float types of the schema."""
+        if not all(isinstance(name, str) for name in attributes):
+            raise ValueError("attribute names must be strings")
+        attr_types = storage.attributes().get(class_name, {})
+        return {name: attr_types[name](value) if attr_types.get(name) in {str, int, float}
+                else value for name, value in attributes.items()}
 
     def do_update(self, arg):
         """Update an instance by adding or updating attributes."""
         args = parse(arg)
-        obj_dict = storage.all()
 
         if not args:
             print("** class name missing **")
@@ -158,37 +560,102 @@ class HBNBCommand(cmd.Cmd):
         if len(args) == 1:
             print("** instance id missing **")
             return False
-        if "{}.{}".format(args[0], args[1]) not in obj_dict:
+        instance = storage.get(args[0], args[1])
+        if instance is None:
             print("** no instance found **")
             return False
         if len(args) == 2:
             print("** attribute name missing **")
             return False
-        if len(args) == 3:
-            try:
-                eval(args[2])
-            except NameError:
-                print("** value missing **")
-                return False
+        value = parse_literal(args[2]) if len(args) == 3 else None
+        if len(args) == 3 and value is None:
+            print("** value missing **")
+            return False
 
-        instance = obj_dict["{}.{}".format(args[0], args[1])]
+        attr_types = storage.attributes().get(args[0], {})
         if len(args) == 4:
             attr_name = args[2]
             attr_value = args[3]
-            if attr_name in instance.__class__.__dict__:
-                attr_type = type(instance.__class__.__dict__[attr_name])
-                instance.__dict__[attr_name] = attr_type(attr_value)
+            if attr_name in attr_types:
+                setattr(instance, attr_name, attr_types[attr_name](attr_value))
             else:
-                instance.__dict__[attr_name] = attr_value
-        elif isinstance(eval(args[2]), dict):
-            for key, value in eval(args[2]).items():
-                if key in instance.__class__.__dict__ and type(instance.__class__.__dict__[key]) in {str, int, float}:
-                    attr_type = type(instance.__class__.__dict__[key])
-                    instance.__dict__[key] = attr_type(value)
+                setattr(instance, attr_name, attr_value)
+        elif isinstance(value, dict):
+            for key, value in value.items():
+                if attr_types.get(key) in {str, int, float}:
+                    setattr(instance, key, attr_types[key](value))
                 else:
-                    instance.__dict__[key] = value
+                    setattr(instance, key, value)
         storage.save()
 
+    def run_batch(self, lines, checkpoint=0, report=None):
+        """Run commands non-interactively inside one storage batch.
+
+        Every save made by the commands is deferred to a single flush at
+        the end, or every checkpoint commands if checkpoint is set. A
+        command that raises is reported and skipped. Per-command timings
+        and the overall throughput are written to report (stderr).
+
+        Returns:
+            dict: {command: [count, seconds]} timings.
+        """
+        report = report or sys.stderr
+        timings = {}
+        executed = 0
+        started = time.perf_counter()
+        with storage.batch():
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                dotted = METHOD_CALL.match(line)
+                name = dotted.group(2) if dotted else line.split()[0]
+                command_started = time.perf_counter()
+                try:
+                    stop = self.onecmd(line)
+                except Exception as error:
+                    print("** error: {} **".format(error))
+                    stop = False
+                timing = timings.setdefault(name, [0, 0.0])
+                timing[0] += 1
+                timing[1] += time.perf_counter() - command_started
+                executed += 1
+                if checkpoint and executed % checkpoint == 0:
+                    storage.flush()
+                if stop:
+                    break
+            flush_started = time.perf_counter()
+        flushed = time.perf_counter() - flush_started
+        elapsed = time.perf_counter() - started
+        report.write("{:<12}{:>10}{:>12}{:>12}\n".format("command", "count", "total ms", "mean ms"))
+        for name, (count, seconds) in sorted(timings.items()):
+            report.write("{:<12}{:>10}{:>12.1f}{:>12.3f}\n".format(
+                name, count, seconds * 1000, seconds * 1000 / count))
+        report.write("{} commands in {:.3f}s ({:.0f} commands/s), final flush {:.1f} ms\n".format(
+            executed, elapsed, executed / elapsed if elapsed else 0, flushed * 1000))
+        return timings
+
+
+def main(argv=None):
+    """Run the console interactively, or a command file with --batch."""
+    parser = argparse.ArgumentParser(description="HBnB console")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the commands in FILE (- for stdin) and flush once")
+    parser.add_argument("--checkpoint", type=int, default=0, metavar="N",
+                        help="in batch mode, also flush every N commands")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record storage and command metrics and write them to FILE on exit")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.dump_at_exit(args.metrics)
+    if args.batch is None:
+        HBNBCommand().cmdloop()
+    elif args.batch == "-":
+        HBNBCommand().run_batch(sys.stdin, args.checkpoint)
+    else:
+        with open(args.batch, "r", encoding="utf-8") as commands:
+            HBNBCommand().run_batch(commands, args.checkpoint)
+
 
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    main()
@@ -1,5 +1,21 @@
 #!/usr/bin/python3
 """__init__ magic method for models directory"""
-from models.engine.file_storage import FileStorage
-storage = FileStorage()
+import os
+from models.engine.metrics import metrics
+if os.getenv("HBNB_METRICS"):
+    metrics.dump_at_exit(os.getenv("HBNB_METRICS"))
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(os.getenv("HBNB_DB_PATH", "hbnb.db"))
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
+    if os.getenv("HBNB_STORAGE_JOURNAL") == "1":
+        storage.configure(journal=True)
+    if os.getenv("HBNB_STORAGE_LAZY") == "1":
+        storage.configure(lazy=True)
+    if os.getenv("HBNB_STORAGE_SHARDED") == "1":
+        storage.configure(sharded=True)
+    if os.getenv("HBNB_STORAGE_CACHE"):
+        storage.configure(cache_size=int(os.getenv("HBNB_STORAGE_CACHE")))
 storage.reload()
@@ -2,8 +2,10 @@
 """Amenity class."""
 
 from models.base_model import BaseModel
+from models.relations import Referrers
 
 
 class Amenity(BaseModel):
     """Amenity class."""
     name = ""
+    places = Referrers("Place", "amenity_ids")
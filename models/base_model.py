@@ -9,6 +9,111 @@ from datetime import datetime
 from models import storage
 
 
+def parse_datetime(value):
+    """
+    Parses an ISO 8601 timestamp as written by datetime.isoformat().
+
+    datetime.fromisoformat() is used first since it is much faster than
+    strptime(); it also accepts timestamps without microseconds, which
+    isoformat() writes when they are zero.
+
+    Args:
+        - value: the timestamp string, or an existing datetime
+
+    Returns:
+        datetime: the parsed timestamp.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        for date_format in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                pass
+        raise
+
+
+class DefaultList(list):
+    """
+    The list read from an attribute that an instance has not set.
+
+    It is a copy of the class default and is not kept by the instance,
+    so that reading does not change the instance. Changing it changes a
+    list of the instance instead, one copied from it the first time, and
+    sets that list again, so that storage saves and re-indexes it.
+    """
+
+    def __init__(self, obj, name, items=()):
+        """
+        Initializes a copy of items read from the attribute name of obj.
+        """
+        super().__init__(items)
+        self.__obj = obj
+        self.__name = name
+
+    def __reduce__(self):
+        """
+        Copies and pickles as a plain list.
+        """
+        return list, (list(self),)
+
+    def _change(self, method, *args, **kwargs):
+        """
+        Applies the list method to the list of the instance and sets it.
+        """
+        value = self.__obj.__dict__.get(self.__name)
+        if not isinstance(value, list):
+            value = list(self)
+        result = getattr(list, method)(value, *args, **kwargs)
+        list.__setitem__(self, slice(None), value)
+        setattr(self.__obj, self.__name, value)
+        # in-place operators return the list that ends up assigned
+        return value if method.startswith("__i") else result
+
+
+def _changing(method):
+    """
+    Returns the DefaultList version of the list method.
+    """
+    def change(self, *args, **kwargs):
+        return self._change(method, *args, **kwargs)
+    change.__name__ = method
+    change.__doc__ = getattr(list, method).__doc__
+    return change
+
+
+for _method in ("append", "extend", "insert", "remove", "pop", "clear", "sort",
+                "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(DefaultList, _method, _changing(_method))
+
+
+class ListDefault:
+    """
+    Class default of a list attribute, copied for each instance.
+
+    An instance that has not set the attribute reads a new empty
+    DefaultList, so that appending to it does not change every other
+    instance; the class reads as [].
+    """
+
+    def __set_name__(self, owner, name):
+        """
+        Records the name of the attribute.
+        """
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """
+        Returns a new empty list, a DefaultList of obj if there is one.
+        """
+        if obj is None:
+            return []
+        return DefaultList(obj, self.name)
+
+
 class BaseModel:
     """
     The BaseModel class serves as the base for the object hierarchy.
@@ -18,24 +123,33 @@ class BaseModel:
         """
         Initializes a new instance of BaseModel.
 
+        Keyword arguments rebuild a stored instance; they are written
+        straight into __dict__ so that hydration skips storage tracking.
+
         Args:
             - *args: tuple of positional arguments
             - **kwargs: dictionary of keyword arguments
         """
         if kwargs:
+            attributes = self.__dict__
             for key, value in kwargs.items():
-                if key == "created_at":
-                    self.created_at = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
-                elif key == "updated_at":
-                    self.updated_at = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
-                else:
-                    setattr(self, key, value)
+                if key == "created_at" or key == "updated_at":
+                    attributes[key] = parse_datetime(value)
+                elif key != "__class__":
+                    attributes[key] = value
         else:
             self.id = str(uuid.uuid4())
             self.created_at = datetime.now()
             self.updated_at = self.created_at
             storage.new(self)
 
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as dirty in storage.
+        """
+        super().__setattr__(name, value)
+        storage.touch(self, name)
+
     def __str__(self):
         """
         Returns a string representation of the BaseModel instance.
@@ -49,8 +163,12 @@ class BaseModel:
         """
         Updates the updated_at attribute with the current datetime and
         saves the instance to storage.
+
+        Every attribute is re-indexed, so that changes made in place, such
+        as an id appended to a list, are found by storage lookups.
         """
         self.updated_at = datetime.now()
+        storage.touch(self)
         storage.save()
 
     def to_dict(self):
@@ -2,9 +2,12 @@
 """City class."""
 
 from models.base_model import BaseModel
+from models.relations import Reference, Referrers
 
 
 class City(BaseModel):
     """City class."""
     state_id = ""
     name = ""
+    state = Reference("State", "state_id")
+    places = Referrers("Place", "city_id", cascade=True)
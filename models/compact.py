@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+"""
+Defines the compact, slot-based representation of the model classes.
+
+compact_class(cls) returns a class named like cls whose instances keep
+the attributes listed in FileStorage.attributes() in __slots__ instead
+of a per-instance __dict__, and any other attribute in a small side
+dictionary. Unset attributes read the class defaults, and list defaults
+such as Place.amenity_ids read as a DefaultList, copied per instance
+instead of shared.
+__str__, to_dict() and save() are the BaseModel ones, reading the
+__dict__ property below, so compact instances print and serialize like
+regular ones.
+"""
+
+import uuid
+from datetime import datetime
+from models import storage
+from models.base_model import BaseModel, DefaultList, parse_datetime
+
+
+class CompactModel:
+    """
+    The root of the compact classes; it holds no attributes itself.
+    """
+    __slots__ = ("_extra", "__weakref__")
+    _defaults = {}
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a new compact instance, from kwargs if given.
+
+        Args:
+            - *args: tuple of positional arguments
+            - **kwargs: dictionary of keyword arguments
+        """
+        set_slot = object.__setattr__
+        if kwargs:
+            for key, value in kwargs.items():
+                if key == "created_at" or key == "updated_at":
+                    set_slot(self, key, parse_datetime(value))
+                elif key != "__class__":
+                    self.__set(key, value)
+        else:
+            set_slot(self, "id", str(uuid.uuid4()))
+            set_slot(self, "created_at", datetime.now())
+            set_slot(self, "updated_at", self.created_at)
+            storage.new(self)
+
+    def __set(self, name, value):
+        """
+        Stores an attribute in its slot, or in the side dictionary.
+        """
+        if name in self._defaults:
+            object.__setattr__(self, name, value)
+        else:
+            try:
+                extra = object.__getattribute__(self, "_extra")
+            except AttributeError:
+                extra = {}
+                object.__setattr__(self, "_extra", extra)
+            extra[name] = value
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as dirty in storage.
+        """
+        self.__set(name, value)
+        storage.touch(self, name)
+
+    def __getattr__(self, name):
+        """
+        Returns an attribute that is not in a slot.
+
+        Called only when normal lookup failed: for extra attributes, and
+        for schema attributes that were never set, which read the class
+        default.
+        """
+        if name in self._defaults:
+            value = self._defaults[name]
+            if isinstance(value, list):
+                return DefaultList(self, name, value)
+            return value
+        try:
+            return object.__getattribute__(self, "_extra")[name]
+        except (AttributeError, KeyError):
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                type(self).__name__, name)) from None
+
+    def __delattr__(self, name):
+        """
+        Deletes an attribute and flags the instance as dirty in storage.
+        """
+        if name in self._defaults:
+            object.__delattr__(self, name)
+        else:
+            try:
+                del object.__getattribute__(self, "_extra")[name]
+            except (AttributeError, KeyError):
+                raise AttributeError(name) from None
+        storage.touch(self, name)
+
+    @property
+    def __dict__(self):
+        """
+        Returns a new dictionary of the attributes set on the instance.
+        """
+        attributes = {}
+        for name in self.__slots__:
+            try:
+                attributes[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        try:
+            attributes.update(object.__getattribute__(self, "_extra"))
+        except AttributeError:
+            pass
+        return attributes
+
+    __str__ = BaseModel.__str__
+    save = BaseModel.save
+    to_dict = BaseModel.to_dict
+
+
+__compact_classes = {}
+
+
+def compact_class(cls):
+    """
+    Returns the compact counterpart of the model class cls.
+
+    Args:
+        - cls: a BaseModel subclass listed in FileStorage.attributes()
+
+    Returns:
+        type: a CompactModel subclass with the same name as cls.
+    """
+    if cls not in __compact_classes:
+        schema = storage.attributes()
+        names = list(schema["BaseModel"])
+        names += [name for name in schema.get(cls.__name__, {}) if name not in names]
+        namespace = {
+            "__slots__": tuple(names),
+            "__module__": cls.__module__,
+            "__doc__": cls.__doc__,
+            "_defaults": {name: getattr(cls, name, None) for name in names}
+        }
+        for klass in reversed(cls.__mro__[:-2]):
+            for name, member in vars(klass).items():
+                if not name.startswith("__") and name not in names:
+                    namespace[name] = member
+        __compact_classes[cls] = type(cls.__name__, (CompactModel,), namespace)
+    return __compact_classes[cls]
@@ -0,0 +1,341 @@
+#!/usr/bin/python3
+"""Module for the DBStorage class."""
+import asyncio
+import datetime
+import json
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from models.engine.file_storage import FileStorage
+from models.engine.geo import bounding_box, distance_km
+from models.engine.query import Query
+
+
+class DBStorage:
+    """Stores instances in a SQLite database, one table per class.
+
+    It has the same interface as FileStorage. Columns come from
+    FileStorage.attributes(); attributes outside that schema are kept as
+    JSON in an "__extra__" column. Objects are only built when a query
+    returns them and are kept in an identity map afterwards. Changed
+    objects are written row by row into the open transaction before any
+    query runs, and save() commits that transaction.
+    """
+    __column_types = {
+        str: "TEXT",
+        int: "INTEGER",
+        float: "REAL",
+        list: "TEXT",
+        datetime.datetime: "TEXT"
+    }
+
+    def __init__(self, db_path="hbnb.db"):
+        """Initializes a storage backed by the database at db_path."""
+        self.__db_path = db_path
+        self.__connection = None
+        self.__objects = {}
+        self.__dirty = set()
+        self.__batch_depth = 0
+        self.__pending = False
+
+    def classes(self):
+        """Returns the dictionary of valid classes and their references."""
+        return FileStorage().classes()
+
+    def attributes(self):
+        """Returns the valid attributes and their types for each class."""
+        return FileStorage().attributes()
+
+    def indexes(self):
+        """Returns the attributes indexed for each class."""
+        return FileStorage().indexes()
+
+    def columns(self, name):
+        """Returns the {column: type} schema of the table of class name."""
+        attributes = self.attributes()
+        columns = dict(attributes["BaseModel"])
+        columns.update(attributes.get(name, {}))
+        return columns
+
+    def reload(self):
+        """Opens the database, creating the tables and their indexes."""
+        if self.__connection is not None:
+            self.__connection.close()
+        self.__connection = sqlite3.connect(self.__db_path)
+        self.__objects = {}
+        self.__dirty = set()
+        indexes = self.indexes()
+        for name in self.classes():
+            columns = ["id TEXT PRIMARY KEY"]
+            for column, kind in self.columns(name).items():
+                if column != "id":
+                    columns.append("{} {}".format(column, DBStorage.__column_types[kind]))
+            columns.append("__extra__ TEXT")
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(
+                name, ", ".join(columns)))
+            for column in indexes.get(name, ()):
+                if self.columns(name).get(column) is list:
+                    # JSON arrays are searched with json_each(), not an index
+                    continue
+                self.__connection.execute(
+                    "CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})".format(name, column))
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS Place_location ON Place (latitude, longitude)")
+        self.__connection.commit()
+
+    def close(self):
+        """Closes the database without committing."""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __name(self, cls):
+        """Returns the class name of cls, given as a class or a string."""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __row(self, obj):
+        """Returns the column values of obj in table order."""
+        record = obj.to_dict()
+        del record["__class__"]
+        columns = self.columns(type(obj).__name__)
+        values = []
+        for column, kind in columns.items():
+            value = record.pop(column, None)
+            if kind is list and value is not None:
+                value = json.dumps(value)
+            values.append(value)
+        values.append(json.dumps(record) if record else None)
+        return values
+
+    def __build(self, name, names, row):
+        """Returns the object of class name stored in row, reusing loaded ones."""
+        key = "{}.{}".format(name, row[names.index("id")])
+        if key in self.__objects:
+            return self.__objects[key]
+        columns = self.columns(name)
+        record = {}
+        for column, value in zip(names, row):
+            if column == "__extra__":
+                if value is not None:
+                    record.update(json.loads(value))
+            elif value is not None:
+                record[column] = json.loads(value) if columns.get(column) is list else value
+        obj = self.classes()[name](**record)
+        self.__objects[key] = obj
+        return obj
+
+    def __select(self, name, where="", params=()):
+        """Returns the objects of class name matching the SQL where clause."""
+        return list(self.__iter_select(name, where, params))
+
+    def __iter_select(self, name, where="", params=()):
+        """Yields the objects of class name matching the SQL where clause."""
+        self.__sync()
+        cursor = self.__connection.execute("SELECT * FROM {} {}".format(name, where), params)
+        names = [column[0] for column in cursor.description]
+        for row in cursor:
+            yield self.__build(name, names, row)
+
+    def __sync(self):
+        """Writes the rows of dirty objects into the open transaction."""
+        if not self.__dirty:
+            return
+        for key in self.__dirty:
+            name, obj_id = key.split(".", 1)
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__connection.execute("DELETE FROM {} WHERE id = ?".format(name), (obj_id,))
+            else:
+                row = self.__row(obj)
+                self.__connection.execute("INSERT OR REPLACE INTO {} VALUES ({})".format(
+                    name, ", ".join("?" * len(row))), row)
+        self.__dirty.clear()
+
+    def all(self, cls=None):
+        """Returns a dictionary of all objects, or of the objects of cls."""
+        names = [self.__name(cls)] if cls is not None else list(self.classes())
+        return {"{}.{}".format(name, obj.id): obj
+                for name in names for obj in self.__select(name)}
+
+    def count(self, cls=None):
+        """Returns the number of objects, or of objects of cls."""
+        self.__sync()
+        names = [self.__name(cls)] if cls is not None else list(self.classes())
+        return sum(self.__connection.execute(
+            "SELECT COUNT(*) FROM {}".format(name)).fetchone()[0] for name in names)
+
+    def get(self, cls, obj_id):
+        """Returns the object of cls with obj_id, or None."""
+        name = self.__name(cls)
+        key = "{}.{}".format(name, obj_id)
+        if key in self.__objects:
+            return self.__objects[key]
+        found = self.__select(name, "WHERE id = ?", (obj_id,))
+        return found[0] if found else None
+
+    def lookup(self, cls, attribute, value):
+        """Returns the objects of cls whose attribute equals, or as a list holds, value."""
+        name = self.__name(cls)
+        kind = self.columns(name).get(attribute)
+        if kind is list:
+            return self.__select(name, "WHERE EXISTS (SELECT 1 FROM json_each({}) "
+                                 "WHERE value = ?)".format(attribute), (value,))
+        if kind is not None:
+            return self.__select(name, "WHERE {} = ?".format(attribute), (value,))
+        found = []
+        for obj in self.__select(name):
+            held = getattr(obj, attribute, None)
+            if held == value or isinstance(held, list) and value in held:
+                found.append(obj)
+        return found
+
+    def places_near(self, latitude, longitude, radius_km, limit=None):
+        """Returns the Places within radius_km of a point, nearest first."""
+        found = []
+        for place in self.places_within(*bounding_box(latitude, longitude, radius_km)):
+            distance = distance_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                found.append((distance, place.id, place))
+        found.sort(key=lambda item: item[:2])
+        places = [place for _, _, place in found]
+        return places if limit is None else places[:limit]
+
+    def places_within(self, south, west, north, east):
+        """Returns the Places inside a latitude/longitude box, read through its index."""
+        where = "WHERE latitude BETWEEN ? AND ? AND (longitude BETWEEN ? AND ?{})"
+        if west > east:
+            # the box crosses the antimeridian
+            where = where.format(" OR longitude BETWEEN ? AND ?")
+            params = (south, north, west, 180.0, -180.0, east)
+        else:
+            where = where.format("")
+            params = (south, north, west, east)
+        return self.__select("Place", where, params)
+
+    def objects(self, cls=None):
+        """Yields the objects, or those of cls, as the rows are read."""
+        names = [self.__name(cls)] if cls is not None else list(self.classes())
+        for name in names:
+            yield from self.__iter_select(name)
+
+    def query(self, cls):
+        """Returns a Query over the objects of cls."""
+        return Query(self, cls)
+
+    def cache_stats(self):
+        """Returns None: objects are read from SQLite as queries need them."""
+        return None
+
+    def has_index(self, cls, attribute):
+        """Returns True if attribute of cls is an indexed column."""
+        name = self.__name(cls)
+        return attribute == "id" or attribute in self.indexes().get(name, ()) and \
+            self.columns(name).get(attribute) is not list
+
+    def new(self, obj):
+        """Adds a new object to the storage."""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__objects[key] = obj
+        self.__dirty.add(key)
+
+    def touch(self, obj, name=None):
+        """Flags a loaded object as dirty after its attribute name changed."""
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            self.__dirty.add(key)
+
+    def delete(self, obj):
+        """Removes an object from the storage."""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__objects.pop(key, None)
+        self.__dirty.add(key)
+
+    def bulk_insert(self, cls, records):
+        """Creates an object of cls from each attribute dictionary in records.
+
+        Returns:
+            list: the new objects, committed with a single save.
+        """
+        name = self.__name(cls)
+        klass = self.classes()[name]
+        created = []
+        for record in records:
+            now = datetime.datetime.now()
+            obj = klass(**dict({"id": str(uuid.uuid4()), "created_at": now,
+                                "updated_at": now}, **record))
+            self.new(obj)
+            created.append(obj)
+        self.save()
+        return created
+
+    def bulk_update(self, objects, attributes):
+        """Sets attributes on every object, refreshes updated_at and saves once.
+
+        Returns:
+            int: the number of objects updated.
+        """
+        count = 0
+        for obj in objects:
+            for name, value in attributes.items():
+                setattr(obj, name, value)
+            obj.updated_at = datetime.datetime.now()
+            self.touch(obj)
+            count += 1
+        self.save()
+        return count
+
+    def bulk_delete(self, objects):
+        """Removes every object in objects and saves once.
+
+        Returns:
+            int: the number of objects removed.
+        """
+        count = 0
+        for obj in list(objects):
+            self.delete(obj)
+            count += 1
+        self.save()
+        return count
+
+    def dirty(self):
+        """Returns the keys changed since the last sync."""
+        return frozenset(self.__dirty)
+
+    @contextmanager
+    def batch(self):
+        """Defers every save made inside the block to one commit on exit."""
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+        if self.__batch_depth == 0 and self.__pending:
+            self.flush()
+
+    def save(self):
+        """Commits the pending changes, unless a batch defers it."""
+        if self.__batch_depth:
+            self.__pending = True
+            return
+        self.flush()
+
+    async def asave(self):
+        """Saves like save(), for the asyncio interface of FileStorage.
+
+        A SQLite connection belongs to the thread that opened it, so the
+        commit runs on the event loop thread.
+        """
+        self.save()
+
+    async def aiter(self, cls=None, chunk_size=1000):
+        """Yields the objects, or those of cls, to an async for loop."""
+        for count, obj in enumerate(self.objects(cls), 1):
+            yield obj
+            if count % chunk_size == 0:
+                await asyncio.sleep(0)
+
+    def flush(self):
+        """Writes the dirty rows and commits them now."""
+        self.__pending = False
+        self.__sync()
+        self.__connection.commit()
@@ -1,29 +1,1032 @@
 #!/usr/bin/python3
 """Module for the FileStorage class."""
+import asyncio
 import datetime
 import json
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from models.engine.geo import GridIndex
+from models.engine.index import AttributeIndex
+from models.engine.journal import Journal
+from models.engine.lazy import LazyObjects
+from models.engine.metrics import metrics
+from models.engine.query import Query
+from models.engine.records import RecordFile
+from models.engine.serializers import get_codec, load_file, open_file
+from models.engine.stream import iter_members
+from models.engine.writer import BackgroundWriter
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory file locking on this platform (Windows)
+    fcntl = None
 
 
 class FileStorage:
-    """Handles serialization and deserialization of instances to and from JSON files."""
+    """Handles serialization and deserialization of instances to and from JSON files.
+
+    By default every save rewrites the whole file. In journal mode a save
+    only appends the changed and deleted records to a log next to the
+    file; reload replays that log and it is compacted into the file in
+    the background once it grows past compact_after records.
+
+    Keys of objects that were added, changed or deleted since the last
+    flush are tracked as dirty. Saves made inside a batch() block are
+    deferred to a single flush when the block exits, and an optional
+    autoflush policy flushes once enough keys are dirty or enough time
+    has passed since the last flush.
+
+    Objects are also indexed per class, and by the attributes declared in
+    indexes() or with add_index(), so that all(cls), count(cls) and
+    lookup() do not scan the whole store; the locations of Places are
+    kept on a grid (see models.engine.geo) for places_near() and
+    places_within(). The indexes are rebuilt when __objects is
+    replaced, so always add and remove objects through new() and
+    delete().
+
+    In lazy mode reload() only reads the keys and record offsets, from
+    the span index ("<file>.spans") written along with the file or else
+    by scanning it, and each object is built the first time it is
+    accessed; saves copy
+    the records that were never built straight from the old file. The
+    streaming option parses the file incrementally instead of loading
+    the whole document at once. The compact option loads objects as the
+    slot-based classes of models.compact to save memory. A cache_size
+    turns the lazy objects into a bounded LRU cache over the file (see
+    LazyObjects and cache_stats()); an object dropped from it is detached,
+    so get it again from storage rather than keeping a reference.
+
+    A full JSON rewrite keeps the serialized form of every object between
+    saves and only serializes again the objects that are dirty or were
+    replaced, so saving a large store after a few changes mostly copies
+    cached bytes; lazy stores reuse the mapped records of built objects
+    in the same way. Objects holding a list or dict, which may be changed
+    in place without being dirtied (a list appended to), are serialized
+    again at every write. The fragments option turns this cache off.
+
+    The JSON file is always replaced atomically through a temporary file;
+    the durability option decides how often writes are fsynced. The codec
+    option switches the file to one of the binary formats of
+    models.engine.serializers; lazy and streaming reloads need JSON.
+
+    In sharded mode each class is stored in its own file (see
+    shard_path()), a save only rewrites the shards of the classes that
+    have dirty keys, and reload decodes the shards on a process pool.
+    A single-file store is split into shards on its first sharded save.
+
+    In records mode the objects live in a memory-mapped record file with
+    a persisted key index (see models.engine.records): reload only reads
+    the index, each object is decoded from its own span on first access,
+    and a save appends the dirty records, and a tombstone for each
+    deleted one, instead of rewriting the file. compact() drops the
+    stale entries. A single-file store is copied into the record file on
+    its first save in this mode.
+
+    asave() and aiter() are the asyncio counterparts of save() and
+    objects(): asave() hands the write to a background writer thread
+    that coalesces concurrent requests, and flush() works on a snapshot
+    of the dirty keys and objects so the event loop can keep reading and
+    changing them meanwhile.
+
+    The storage is thread-safe. Changes to the object table, the indexes
+    and the dirty keys are made under one lock, and flush() and reload()
+    are serialized by another, taken first. Reads (get, all, count,
+    lookup, objects) take no lock: they only do single dictionary
+    operations or copy a key list, which the GIL keeps atomic, and see
+    the state before or after any concurrent change. Rebuilt indexes are
+    swapped in whole. batch() is process-wide: it defers the saves of
+    every thread until the outermost block exits.
+
+    Several processes may share a store. Writes hold an exclusive flock
+    on "<file>.lock" and reloads a shared one. The (mtime, size, inode)
+    of each file is remembered after every read and write; if a file
+    changed by the time of the next write, the records another process
+    added, changed or removed are merged in first, and dirty keys keep
+    their local version. refresh() does the same merge without writing.
+    Journal mode only takes the lock: its appends never overwrite
+    records of other processes.
+    """
     __file_path = "file.json"
     __objects = {}
+    __dirty = set()
+    __journal = Journal("file.json.journal")
+    __journaling = False
+    __compact_after = 10000
+    __batch_depth = 0
+    __bulk_depth = 0
+    __pending = False
+    __autoflush_size = 0
+    __autoflush_interval = 0
+    __flushed_at = time.monotonic()
+    __by_class = {}
+    __attribute_indexes = {}
+    __extra_indexes = {}
+    __indexed = None
+    __class_refs = None
+    __lazy = False
+    __cache_size = 0
+    __streaming = False
+    __compact = False
+    __codec = get_codec("json")
+    __sharded = False
+    __rewrite_shards = False
+    __records = None
+    __rewrite_records = False
+    __fragments = {}
+    __fragments_of = None
+    __workers = None
+    __durability = "save"
+    __sync_interval = 1.0
+    __synced_at = 0.0
+    __lock = threading.RLock()
+    __flush_lock = threading.RLock()
+    __process_lock = threading.RLock()
+    __lock_file = None
+    __versions = {}
+    __writer = None
+
+    def configure(self, file_path=None, journal=None, compact_after=None,
+                  autoflush_size=None, autoflush_interval=None, lazy=None,
+                  streaming=None, compact=None, durability=None,
+                  sync_interval=None, codec=None, sharded=None, workers=None,
+                  cache_size=None, records=None, fragments=None):
+        """Sets storage options; options left as None are unchanged.
+
+        An autoflush_size or autoflush_interval (seconds) of 0 disables
+        that autoflush trigger. durability is one of "none" (never fsync),
+        "save" (fsync every write) or "interval" (fsync a write only if
+        sync_interval seconds have passed since the last fsync). codec
+        names the file format, one of models.engine.serializers.codecs.
+        workers caps the reload process pool of sharded mode; 1 loads the
+        shards in this process. cache_size bounds the objects a lazy store
+        keeps built (0 keeps them all); it applies from the next reload().
+        records switches to the record file of models.engine.records.
+        fragments keeps the serialized JSON of each object between saves.
+        """
+        modes = [name for name, current, value in (
+            ("journal", FileStorage.__journaling, journal),
+            ("sharded", FileStorage.__sharded, sharded),
+            ("records", FileStorage.__records is not None, records))
+            if (current if value is None else value)]
+        if len(modes) > 1:
+            raise ValueError("{} modes cannot be combined".format(" and ".join(modes)))
+        if file_path is not None:
+            FileStorage.__journal.wait()
+            FileStorage.__file_path = file_path
+            FileStorage.__journal = Journal(file_path + ".journal")
+        if journal is not None:
+            FileStorage.__journaling = bool(journal)
+        if compact_after is not None:
+            FileStorage.__compact_after = compact_after
+        if autoflush_size is not None:
+            FileStorage.__autoflush_size = autoflush_size
+        if autoflush_interval is not None:
+            FileStorage.__autoflush_interval = autoflush_interval
+        if lazy is not None:
+            FileStorage.__lazy = bool(lazy)
+        if cache_size is not None:
+            FileStorage.__cache_size = cache_size
+        if streaming is not None:
+            FileStorage.__streaming = bool(streaming)
+        if durability is not None:
+            if durability not in ("none", "save", "interval"):
+                raise ValueError("Unknown durability: {}".format(durability))
+            FileStorage.__durability = durability
+        if sync_interval is not None:
+            FileStorage.__sync_interval = sync_interval
+        if codec is not None:
+            FileStorage.__codec = get_codec(codec)
+        if sharded is not None and bool(sharded) != FileStorage.__sharded:
+            FileStorage.__sharded = bool(sharded)
+            FileStorage.__rewrite_shards = FileStorage.__sharded
+        if workers is not None:
+            FileStorage.__workers = workers
+        if compact is not None:
+            FileStorage.__compact = bool(compact)
+            FileStorage.__class_refs = None
+        if records is not None and not records:
+            FileStorage.__records = None
+        elif records or FileStorage.__records is not None and \
+                (file_path is not None or codec is not None):
+            FileStorage.__records = RecordFile(FileStorage.__file_path, FileStorage.__codec.name)
+            FileStorage.__rewrite_records = True
+        if fragments is not None:
+            FileStorage.__fragments = {} if fragments else None
+        elif FileStorage.__fragments:
+            # the next write may not be a full JSON rewrite of these objects
+            FileStorage.__fragments = {}
+
+    def all(self, cls=None):
+        """Returns the __objects dictionary, or the objects of one class.
+
+        Args:
+            cls: a class or class name to restrict the result to.
+        """
+        if cls is None:
+            return FileStorage.__objects
+        objects = FileStorage.__objects
+        found = {}
+        for key in list(self.__class_index(cls)):
+            obj = objects.get(key)
+            if obj is not None:
+                found[key] = obj
+        return found
+
+    def get(self, cls, obj_id):
+        """Returns the object of cls with obj_id, or None."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        return FileStorage.__objects.get("{}.{}".format(name, obj_id))
+
+    def count(self, cls=None):
+        """Returns the number of objects, or of objects of one class."""
+        if cls is None:
+            return len(FileStorage.__objects)
+        return len(self.__class_index(cls))
+
+    def lookup(self, cls, attribute, value):
+        """Returns the objects of cls whose attribute equals value.
+
+        A list attribute (such as Place.amenity_ids) matches if it holds
+        value. Uses the attribute index when one is declared, otherwise
+        scans the objects of cls only.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        index = self.__attribute_index(name, attribute)
+        if index is not None:
+            objects = FileStorage.__objects
+            return [obj for obj in map(objects.get, list(index.get(value)))
+                    if obj is not None]
+        found = []
+        for obj in self.all(name).values():
+            held = getattr(obj, attribute, None)
+            if held == value or isinstance(held, list) and value in held:
+                found.append(obj)
+        return found
+
+    def places_near(self, latitude, longitude, radius_km, limit=None):
+        """Returns the Places within radius_km of a point, nearest first.
+
+        Distances are great-circle ones; the grid index of Place locations
+        is built on first use and kept up to date afterwards.
+        """
+        objects = FileStorage.__objects
+        found = self.__location_index().near(latitude, longitude, radius_km)
+        places = (objects.get(key) for _, key in found)
+        places = [place for place in places if place is not None]
+        return places if limit is None else places[:limit]
+
+    def places_within(self, south, west, north, east):
+        """Returns the Places inside a latitude/longitude box.
+
+        The box is inclusive; west greater than east makes it cross the
+        antimeridian.
+        """
+        objects = FileStorage.__objects
+        places = (objects.get(key) for key, _, _ in
+                  self.__location_index().within(south, west, north, east))
+        return [place for place in places if place is not None]
+
+    def objects(self, cls=None):
+        """Yields the stored objects, or those of cls, one at a time.
+
+        With a lazy store each object is only built when it is reached.
+        """
+        objects = FileStorage.__objects
+        keys = list(objects) if cls is None else list(self.__class_index(cls))
+        for key in keys:
+            obj = objects.get(key)
+            if obj is not None:
+                yield obj
+
+    def query(self, cls):
+        """Returns a Query over the objects of cls."""
+        return Query(self, cls)
+
+    def cache_stats(self):
+        """Returns the object cache statistics of a lazy store, or None.
+
+        The dictionary holds the capacity, the resident (built) and stored
+        object counts, hits, misses, evictions and the hit rate.
+        """
+        objects = FileStorage.__objects
+        if isinstance(objects, LazyObjects):
+            return objects.stats()
+        return None
 
-    def all(self):
-        """Returns the __objects dictionary."""
-        return FileStorage.__objects
+    def has_index(self, cls, attribute):
+        """Returns True if attribute of cls is indexed."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        return attribute in self.indexes().get(name, ()) or \
+            attribute in FileStorage.__extra_indexes.get(name, ())
 
+    def indexes(self):
+        """Returns the attributes indexed by default for each class."""
+        default_indexes = {
+            "City": ("state_id",),
+            "Place": ("city_id", "user_id", "amenity_ids"),
+            "Review": ("place_id", "user_id")
+        }
+        return default_indexes
+
+    def add_index(self, cls, attribute):
+        """Declares a secondary index on attribute for cls."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        FileStorage.__extra_indexes.setdefault(name, set()).add(attribute)
+
+    def __class_index(self, cls):
+        """Returns the internal {key: None} dictionary of one class."""
+        self.__ensure_indexes()
+        name = cls if isinstance(cls, str) else cls.__name__
+        return FileStorage.__by_class.get(name, {})
+
+    def __attribute_index(self, name, attribute):
+        """Returns the index on attribute of class name, or None if undeclared.
+
+        Indexes are built on first use, so that a lazily loaded store only
+        builds the objects of the classes that are actually looked up.
+        """
+        self.__ensure_indexes()
+        index = FileStorage.__attribute_indexes.get(name, {}).get(attribute)
+        if index is not None or not self.has_index(name, attribute):
+            return index
+        with FileStorage.__lock:
+            indexes = FileStorage.__attribute_indexes.setdefault(name, {})
+            if attribute not in indexes:
+                index = AttributeIndex(attribute)
+                for key, obj in self.all(name).items():
+                    index.add(key, obj)
+                indexes[attribute] = index
+            return indexes[attribute]
+
+    def __location_index(self):
+        """Returns the grid index of Place locations, building it on first use."""
+        self.__ensure_indexes()
+        # kept with the attribute indexes, under a name no attribute has
+        name = "latitude,longitude"
+        index = FileStorage.__attribute_indexes.get("Place", {}).get(name)
+        if index is not None:
+            return index
+        with FileStorage.__lock:
+            indexes = FileStorage.__attribute_indexes.setdefault("Place", {})
+            if name not in indexes:
+                index = GridIndex()
+                for key, obj in self.all("Place").items():
+                    index.add(key, obj)
+                indexes[name] = index
+            return indexes[name]
+
+    def __ensure_indexes(self):
+        """Rebuilds the indexes if __objects was replaced or edited directly."""
+        if self.__indexes_current():
+            return
+        with FileStorage.__lock:
+            if self.__indexes_current():
+                return
+            objects = FileStorage.__objects
+            by_class = {}
+            for key in list(objects):
+                by_class.setdefault(key.partition(".")[0], {})[key] = None
+            FileStorage.__by_class = by_class
+            FileStorage.__attribute_indexes = {}
+            FileStorage.__indexed = objects
+
+    @staticmethod
+    def __indexes_current():
+        """Returns True if the class index matches __objects."""
+        objects = FileStorage.__objects
+        return FileStorage.__indexed is objects and \
+            sum(map(len, FileStorage.__by_class.values())) == len(objects)
+
+    def __index(self, key, obj):
+        """Adds obj to the class index and the built attribute indexes."""
+        name = type(obj).__name__
+        FileStorage.__by_class.setdefault(name, {})[key] = None
+        for index in FileStorage.__attribute_indexes.get(name, {}).values():
+            index.remove(key)
+            index.add(key, obj)
+
+    def __unindex(self, key):
+        """Removes key from the class index and the built attribute indexes."""
+        name = key.partition(".")[0]
+        FileStorage.__by_class.get(name, {}).pop(key, None)
+        for index in FileStorage.__attribute_indexes.get(name, {}).values():
+            index.remove(key)
+
+    @metrics.timed("storage.new")
     def new(self, obj):
         """Adds a new object to the __objects dictionary."""
         key = "{}.{}".format(type(obj).__name__, obj.id)
-        FileStorage.__objects[key] = obj
+        self.__ensure_indexes()
+        with FileStorage.__lock:
+            FileStorage.__objects[key] = obj
+            self.__index(key, obj)
+            FileStorage.__dirty.add(key)
+        self.__autoflush()
 
+    def touch(self, obj, name=None):
+        """Flags a stored object as dirty after its attribute name changed."""
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        objects = FileStorage.__objects
+        if key not in objects:
+            return
+        with FileStorage.__lock:
+            if isinstance(objects, LazyObjects):
+                # an object evicted from the cache goes back, to be saved
+                if not objects.restore(key, obj):
+                    return
+            elif objects.get(key) is not obj:
+                return
+            indexes = FileStorage.__attribute_indexes.get(type(obj).__name__)
+            if indexes:
+                for index in indexes.values():
+                    if name is None or name in index.attributes:
+                        index.update(key, obj)
+            FileStorage.__dirty.add(key)
+        self.__autoflush()
+
+    def delete(self, obj):
+        """Removes an object from the __objects dictionary."""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__ensure_indexes()
+        with FileStorage.__lock:
+            if key not in FileStorage.__objects:
+                return
+            del FileStorage.__objects[key]
+            self.__unindex(key)
+            FileStorage.__dirty.add(key)
+        self.__autoflush()
+
+    def bulk_insert(self, cls, records):
+        """Creates an object of cls from each attribute dictionary in records.
+
+        Every object gets a new id and timestamps unless its record has
+        them. The objects are added in memory and persisted with a single
+        save, which a surrounding batch() defers as usual.
+
+        Returns:
+            list: the new objects.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        objects = FileStorage.__objects
+        created = []
+        self.__ensure_indexes()
+        with self.__bulk(), FileStorage.__lock:
+            for record in records:
+                now = datetime.datetime.now()
+                record = dict({"id": str(uuid.uuid4()), "created_at": now,
+                               "updated_at": now}, **record)
+                record["__class__"] = name
+                obj = self.__build(record)
+                key = "{}.{}".format(name, obj.id)
+                objects[key] = obj
+                self.__index(key, obj)
+                FileStorage.__dirty.add(key)
+                created.append(obj)
+        return created
+
+    def bulk_update(self, objects, attributes):
+        """Sets attributes on every stored object and refreshes updated_at.
+
+        Returns:
+            int: the number of objects updated.
+        """
+        count = 0
+        with self.__bulk(), FileStorage.__lock:
+            for obj in objects:
+                for name, value in attributes.items():
+                    setattr(obj, name, value)
+                obj.updated_at = datetime.datetime.now()
+                count += 1
+        return count
+
+    def bulk_delete(self, objects):
+        """Removes every stored object in objects.
+
+        Returns:
+            int: the number of objects removed.
+        """
+        count = 0
+        self.__ensure_indexes()
+        with self.__bulk(), FileStorage.__lock:
+            for obj in objects:
+                key = "{}.{}".format(type(obj).__name__, obj.id)
+                if key in FileStorage.__objects:
+                    del FileStorage.__objects[key]
+                    self.__unindex(key)
+                    FileStorage.__dirty.add(key)
+                    count += 1
+        return count
+
+    @contextmanager
+    def __bulk(self):
+        """Pauses autoflush inside the block, then saves once on exit."""
+        with FileStorage.__lock:
+            FileStorage.__bulk_depth += 1
+        try:
+            yield
+        finally:
+            with FileStorage.__lock:
+                FileStorage.__bulk_depth -= 1
+        self.save()
+
+    def dirty(self):
+        """Returns the keys changed since the last flush."""
+        return frozenset(FileStorage.__dirty)
+
+    @contextmanager
+    def batch(self):
+        """Defers every save made inside the block to one flush on exit.
+
+        Blocks may be nested; only the outermost one flushes. If the block
+        raises, nothing is flushed and the changes stay dirty.
+        """
+        with FileStorage.__lock:
+            FileStorage.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            with FileStorage.__lock:
+                FileStorage.__batch_depth -= 1
+        if FileStorage.__batch_depth == 0 and FileStorage.__pending:
+            self.flush()
+
+    @metrics.timed("storage.save")
     def save(self):
-        """Serializes __objects to a JSON file."""
-        with open(FileStorage.__file_path, "w", encoding="utf-8") as file:
-            serialized_data = {key: value.to_dict() for key, value in FileStorage.__objects.items()}
-            json.dump(serialized_data, file)
+        """Persists __objects, unless a batch defers it to the batch exit."""
+        if FileStorage.__batch_depth:
+            FileStorage.__pending = True
+            return
+        self.flush()
+
+    def __autoflush(self):
+        """Flushes when the autoflush size or interval has been reached."""
+        if FileStorage.__bulk_depth:
+            return
+        size = FileStorage.__autoflush_size
+        interval = FileStorage.__autoflush_interval
+        if size and len(FileStorage.__dirty) >= size:
+            self.flush()
+        elif interval and time.monotonic() - FileStorage.__flushed_at >= interval:
+            self.flush()
+
+    @metrics.timed("storage.flush")
+    def flush(self):
+        """Writes pending changes now, as a journal append or a full rewrite.
+
+        The dirty keys and the object table are snapshotted first, so
+        objects may keep changing while the write runs (for instance
+        during an asave()); those changes stay dirty for the next flush.
+        """
+        with FileStorage.__flush_lock:
+            with FileStorage.__lock:
+                FileStorage.__pending = False
+                FileStorage.__flushed_at = time.monotonic()
+                dirty, FileStorage.__dirty = FileStorage.__dirty, set()
+            try:
+                self.__write(dirty)
+            except BaseException:
+                with FileStorage.__lock:
+                    FileStorage.__dirty.update(dirty)
+                raise
+            metrics.count("storage.objects_written", len(dirty))
+            metrics.gauge("storage.objects", len(FileStorage.__objects))
+
+    def __write(self, dirty):
+        """Persists the changes to the dirty keys."""
+        objects = FileStorage.__objects
+        if FileStorage.__journaling:
+            records = []
+            for key in dirty:
+                obj = objects.get(key)
+                records.append((key, obj.to_dict() if obj is not None else None))
+            with self.__locked():
+                metrics.count("storage.bytes_written",
+                              FileStorage.__journal.append(records, self.__sync))
+            if FileStorage.__journal.entries >= FileStorage.__compact_after:
+                self.compact()
+            return
+        FileStorage.__journal.wait()
+        with self.__locked():
+            self.__merge_changes(dirty)
+            objects = FileStorage.__objects
+            if FileStorage.__sharded:
+                self.__write_shards(dirty)
+            elif FileStorage.__records is not None:
+                self.__write_records(dirty)
+            elif isinstance(objects, LazyObjects) and FileStorage.__codec.name == "json":
+                self.__write_lazy(objects)
+            elif FileStorage.__fragments is not None and FileStorage.__codec.name == "json":
+                self.__write_fragments(objects, dirty)
+            else:
+                serialized_data = {key: value.to_dict() for key, value in list(objects.items())}
+                self.__replace_file(lambda file: FileStorage.__codec.dump(serialized_data, file))
+        FileStorage.__journal.discard()
+
+    def refresh(self):
+        """Merges the changes other processes saved since the last read or write.
+
+        Returns:
+            bool: True if a file had changed.
+        """
+        if FileStorage.__journaling:
+            return False
+        with FileStorage.__flush_lock, self.__locked(exclusive=False):
+            return self.__merge_changes(set())
+
+    @contextmanager
+    def __locked(self, exclusive=True):
+        """Holds the advisory lock of the store, shared or exclusive.
+
+        Nested uses in this process reuse the lock already held.
+        """
+        with FileStorage.__process_lock:
+            if fcntl is None or FileStorage.__lock_file is not None:
+                yield
+                return
+            lock_file = open(FileStorage.__file_path + ".lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                FileStorage.__lock_file = lock_file
+                yield
+            finally:
+                FileStorage.__lock_file = None
+                # closing the file releases the lock
+                lock_file.close()
+
+    @staticmethod
+    def __version(path):
+        """Returns the (mtime, size, inode) of path, or None if it is missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def __merge_changes(self, dirty):
+        """Merges every store file changed by another process since we last saw it.
+
+        Returns:
+            bool: True if a file had changed.
+        """
+        if FileStorage.__records is not None:
+            return self.__merge_records(dirty)
+        if FileStorage.__sharded:
+            paths = {name: self.shard_path(name) for name in self.classes()}
+        else:
+            paths = {None: FileStorage.__file_path}
+        changed = False
+        for name, path in paths.items():
+            version = self.__version(path)
+            if version is None or version == FileStorage.__versions.get(path):
+                continue
+            try:
+                self.__merge(path, name, dirty)
+            except ValueError:
+                # unreadable: the next write replaces it
+                continue
+            FileStorage.__versions[path] = version
+            changed = True
+        if changed and FileStorage.__fragments:
+            FileStorage.__fragments = {}
+        return changed
+
+    def __merge_records(self, dirty):
+        """Applies the entries other processes appended to the record file.
+
+        Returns:
+            bool: True if the record file had changed.
+        """
+        records = FileStorage.__records
+        version = self.__version(records.data_path)
+        if version is None or version == FileStorage.__versions.get(records.data_path):
+            return False
+        changed = records.refresh()
+        objects = FileStorage.__objects
+        with FileStorage.__lock:
+            dirty = dirty | FileStorage.__dirty
+            if isinstance(objects, LazyObjects):
+                for key, span in changed.items():
+                    if span is None and key not in dirty:
+                        self.__unindex(key)
+                objects.update(records.data_path, changed, dirty)
+                FileStorage.__indexed = None
+            else:
+                for key, span in changed.items():
+                    if key in dirty:
+                        continue
+                    if span is None:
+                        if objects.pop(key, None) is not None:
+                            self.__unindex(key)
+                    else:
+                        obj = self.__build(records.read(key))
+                        objects[key] = obj
+                        self.__index(key, obj)
+        FileStorage.__versions[records.data_path] = version
+        return True
+
+    def __merge(self, path, name, dirty):
+        """Applies the records of path that differ from memory, except dirty keys.
+
+        Only the records added, changed or removed on disk are built or
+        dropped; the other objects are kept as they are. name restricts
+        the merge to one class, for a shard file.
+        """
+        objects = FileStorage.__objects
+        lazy = name is None and isinstance(objects, LazyObjects)
+        spans = {}
+        if lazy:
+            records = {}
+            for key, record, start, end in iter_members(path, "latin-1"):
+                records[key] = record
+                spans[key] = (start, end)
+        else:
+            records = load_file(path, FileStorage.__codec.name)
+        scope = list(objects) if name is None else list(self.__class_index(name))
+        with FileStorage.__lock:
+            dirty = dirty | FileStorage.__dirty
+            for key in scope:
+                if key not in records and key not in dirty and key in objects:
+                    del objects[key]
+                    self.__unindex(key)
+            for key, record in records.items():
+                if key in dirty or (lazy and not objects.is_loaded(key)):
+                    continue
+                obj = objects.get(key)
+                if obj is None or obj.to_dict() != record:
+                    obj = self.__build(record)
+                    objects[key] = obj
+                    self.__index(key, obj)
+            if lazy:
+                objects.rebase(path, {key: span for key, span in spans.items()
+                                      if key not in dirty}, dirty)
+                FileStorage.__indexed = None
+
+    async def asave(self):
+        """Saves on the background writer thread without blocking the event loop.
+
+        Concurrent asave() calls are coalesced into as few writes as
+        possible; each one returns once a write that started after it was
+        made has finished. Inside a batch() the save is deferred as with
+        save().
+        """
+        if FileStorage.__batch_depth:
+            FileStorage.__pending = True
+            return
+        if FileStorage.__writer is None:
+            FileStorage.__writer = BackgroundWriter(FileStorage().flush)
+        await asyncio.wrap_future(FileStorage.__writer.request())
+
+    async def aiter(self, cls=None, chunk_size=1000):
+        """Yields the stored objects, or those of cls, to an async for loop.
+
+        The keys are snapshotted when iteration starts, as in objects(),
+        and control goes back to the event loop every chunk_size objects.
+        """
+        for count, obj in enumerate(self.objects(cls), 1):
+            yield obj
+            if count % chunk_size == 0:
+                await asyncio.sleep(0)
+
+    def __write_lazy(self, objects):
+        """Rewrites the JSON file, copying unchanged records byte for byte."""
+        spans = {}
+
+        def write(file):
+            offset = file.write(b"{")
+            for key in objects:
+                record = objects.raw(key)
+                if record is None or objects.is_loaded(key) and \
+                        self.__has_containers(objects[key]):
+                    record = json.dumps(objects[key].to_dict()).encode()
+                prefix = "{}{}: ".format(", " if spans else "", json.dumps(key)).encode()
+                offset += file.write(prefix)
+                spans[key] = (offset, offset + len(record))
+                offset += file.write(record)
+            file.write(b"}")
+
+        self.__replace_file(write, binary=True)
+        file_path = FileStorage.__file_path
+        self.__save_spans(file_path, spans, FileStorage.__versions[file_path])
+        with FileStorage.__lock:
+            objects.rebase(file_path, spans, FileStorage.__dirty)
+
+    def __write_fragments(self, objects, dirty):
+        """Rewrites the JSON file from the cached "key": {...} fragment of each object.
+
+        The cache holds the fragments as last written, so only those of
+        the dirty keys are serialized again. It is cleared whenever
+        objects are replaced without being dirtied (reload, a merge of
+        changes from another process, a change of options), and an empty
+        cache is rebuilt from every object. So is a cache that no longer
+        matches the objects, as after a key was removed from all() or
+        __objects replaced directly, the case __ensure_indexes() detects.
+        Objects holding a list or dict get no fragment (None) and are
+        serialized at every write, since such values change in place.
+        """
+        cache = FileStorage.__fragments
+        if FileStorage.__fragments_of is not objects:
+            cache.clear()
+            FileStorage.__fragments_of = objects
+
+        def serialize(key, obj):
+            return "{}: {}".format(json.dumps(key), json.dumps(obj.to_dict())).encode()
+
+        def update(keys):
+            for key in keys:
+                obj = objects.get(key)
+                if obj is None:
+                    cache.pop(key, None)
+                else:
+                    cache[key] = None if self.__has_containers(obj) else serialize(key, obj)
+
+        def write(file):
+            file.write(b"{")
+            for start in range(0, len(fragments), 4096):
+                if start:
+                    file.write(b", ")
+                file.write(b", ".join(fragments[start:start + 4096]))
+            file.write(b"}")
+
+        try:
+            if cache:
+                update(dirty)
+            if len(cache) != len(objects):
+                cache.clear()
+                update(list(objects))
+            fragments = []
+            for key, fragment in list(cache.items()):
+                if fragment is None:
+                    obj = objects.get(key)
+                    if obj is None:
+                        # deleted meanwhile: dirty for the next write
+                        continue
+                    fragment = serialize(key, obj)
+                fragments.append(fragment)
+            self.__replace_file(write, binary=True)
+        except BaseException:
+            cache.clear()
+            raise
+
+    @staticmethod
+    def __has_containers(obj):
+        """Returns True if an attribute of obj is a list or dict."""
+        return any(isinstance(value, (list, dict)) for value in obj.__dict__.values())
+
+    def __write_records(self, dirty):
+        """Appends the dirty records and tombstones to the record file.
+
+        The index is only rewritten once the entries appended after it
+        grow past a quarter of the file (and 1 MiB); load() scans the
+        rest.
+        """
+        records = FileStorage.__records
+        objects = FileStorage.__objects
+        keys = list(objects) if FileStorage.__rewrite_records else dirty
+        entries = []
+        for key in keys:
+            obj = objects.get(key) if key in objects else None
+            entries.append((key, obj.to_dict() if obj is not None else None))
+        size = records.size
+        written = records.append(entries, self.__sync)
+        metrics.count("storage.bytes_written", records.size - size)
+        FileStorage.__rewrite_records = False
+        FileStorage.__versions[records.data_path] = self.__version(records.data_path)
+        if records.unindexed() > max(1 << 20, records.size // 4):
+            records.save_index()
+        if isinstance(objects, LazyObjects):
+            with FileStorage.__lock:
+                objects.written(records.data_path, written, FileStorage.__dirty)
+
+    def shard_path(self, cls):
+        """Returns the file holding the objects of cls in sharded mode."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        return "{}.{}".format(FileStorage.__file_path, name)
+
+    def __write_shards(self, dirty):
+        """Rewrites the shard file of every class with a dirty key."""
+        if FileStorage.__rewrite_shards:
+            names = set(self.classes())
+            FileStorage.__rewrite_shards = False
+        else:
+            names = {key.partition(".")[0] for key in dirty}
+        codec = FileStorage.__codec
+        for name in names:
+            records = {key: obj.to_dict() for key, obj in list(self.all(name).items())}
+            self.__replace_file(lambda file: codec.dump(records, file),
+                                file_path=self.shard_path(name))
+
+    def __read_shards(self, paths):
+        """Returns the objects stored in the shard files at paths.
+
+        The files are decoded in parallel on a process pool, then the
+        objects are built here.
+        """
+        codec = [FileStorage.__codec.name] * len(paths)
+        workers = min(len(paths), FileStorage.__workers or os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                shards = list(pool.map(load_file, paths, codec))
+        else:
+            shards = list(map(load_file, paths, codec))
+        return {key: self.__build(value) for records in shards for key, value in records.items()}
+
+    def __replace_file(self, write, binary=None, file_path=None):
+        """Atomically replaces the JSON file, or file_path, with what write(file) writes.
+
+        The file is opened in binary mode if binary is True, or if binary
+        is None and the codec is a binary one.
+
+        The data goes to a temporary file, synced as the durability option
+        asks, then renamed over the JSON file; a crash at any point leaves
+        either the old or the new file, never a truncated one.
+        """
+        file_path = file_path or FileStorage.__file_path
+        tmp_path = "{}.{}.tmp".format(file_path, os.getpid())
+        if binary is None:
+            binary = FileStorage.__codec.binary
+        try:
+            with open(tmp_path, "wb") if binary else \
+                    open(tmp_path, "w", encoding="utf-8") as file:
+                write(file)
+                metrics.count("storage.bytes_written", file.tell())
+                synced = self.__sync(file)
+            os.replace(tmp_path, file_path)
+            FileStorage.__versions[file_path] = self.__version(file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if synced:
+            self.__sync_directory(file_path)
+
+    def __sync(self, file):
+        """Flushes file to disk if the durability option asks for it now.
+
+        Returns:
+            bool: True if file was synced.
+        """
+        durability = FileStorage.__durability
+        if durability == "none":
+            return False
+        now = time.monotonic()
+        if durability == "interval" and now - FileStorage.__synced_at < FileStorage.__sync_interval:
+            return False
+        file.flush()
+        os.fsync(file.fileno())
+        FileStorage.__synced_at = now
+        return True
+
+    @staticmethod
+    def __sync_directory(file_path):
+        """Syncs the directory entry of file_path after a rename."""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def compact(self, wait=False):
+        """Folds the journal into the JSON file on a background thread.
+
+        In records mode, rewrites the record file without its stale
+        entries and tombstones instead, in this thread and under the
+        store lock; python3 -m models.engine.records compact does the
+        same offline.
+        """
+        records = FileStorage.__records
+        if records is None:
+            FileStorage.__journal.compact(self.__load_file, self.__dump_file, wait)
+            return
+        with FileStorage.__flush_lock, self.__locked():
+            self.__merge_changes(set())
+            records.compact()
+            FileStorage.__versions[records.data_path] = self.__version(records.data_path)
+            objects = FileStorage.__objects
+            if isinstance(objects, LazyObjects):
+                with FileStorage.__lock:
+                    objects.rebase(records.data_path, records.spans, FileStorage.__dirty)
+
+    def __load_file(self):
+        """Returns the records stored in the JSON file."""
+        if not os.path.isfile(FileStorage.__file_path):
+            return {}
+        with open_file(FileStorage.__file_path, "r", FileStorage.__codec) as file:
+            return FileStorage.__codec.load(file)
+
+    def __dump_file(self, records):
+        """Atomically replaces the JSON file with records."""
+        with self.__locked():
+            self.__replace_file(lambda file: FileStorage.__codec.dump(records, file))
 
     def classes(self):
         """Returns the dictionary of valid classes and their references."""
@@ -46,15 +1049,115 @@ class FileStorage:
         }
         return valid_classes
 
+    @metrics.timed("storage.reload")
     def reload(self):
-        """Deserializes the JSON file back into __objects."""
-        if not os.path.isfile(FileStorage.__file_path):
+        """Deserializes the JSON file and replays the journal into __objects."""
+        file_path = FileStorage.__file_path
+        shards = []
+        if FileStorage.__sharded:
+            shards = [path for path in map(self.shard_path, self.classes()) if os.path.isfile(path)]
+        records = FileStorage.__records
+        if records is not None and records.exists():
+            shards = [records.data_path]
+        if not shards and not os.path.isfile(file_path) and not FileStorage.__journal.exists():
             return
-        with open(FileStorage.__file_path, "r", encoding="utf-8") as file:
-            loaded_data = json.load(file)
-            deserialized_objects = {key: self.classes()[value["__class__"]](**value)
-                                    for key, value in loaded_data.items()}
-            FileStorage.__objects = deserialized_objects
+        with FileStorage.__flush_lock:
+            FileStorage.__journal.wait()
+            try:
+                with self.__locked(exclusive=False):
+                    if records is not None and shards:
+                        objects = LazyObjects(records.data_path, records.load(), self.__build,
+                                              FileStorage.__cache_size, records.codec.loads)
+                        FileStorage.__rewrite_records = False
+                    elif shards:
+                        objects = self.__read_shards(shards)
+                    else:
+                        objects = self.__read_objects(file_path)
+                        FileStorage.__rewrite_shards = FileStorage.__sharded
+                        FileStorage.__rewrite_records = records is not None
+                    for path in shards or [file_path]:
+                        FileStorage.__versions[path] = self.__version(path)
+            except ValueError:
+                # the file is not valid JSON: keep the objects in memory
+                return
+            for key, record in FileStorage.__journal.records():
+                if record is None:
+                    objects.pop(key, None)
+                else:
+                    objects[key] = self.__build(record)
+            with FileStorage.__lock:
+                previous = FileStorage.__objects
+                FileStorage.__objects = objects
+                FileStorage.__dirty.clear()
+                if FileStorage.__fragments:
+                    FileStorage.__fragments = {}
+            if isinstance(previous, LazyObjects):
+                previous.close()
+        metrics.gauge("storage.objects", len(objects))
+        self.__ensure_indexes()
+
+    def __read_objects(self, file_path):
+        """Returns the objects stored in the JSON file, as the options ask."""
+        if not os.path.isfile(file_path):
+            return {}
+        streamable = FileStorage.__codec.name == "json"
+        if FileStorage.__lazy and streamable:
+            return LazyObjects(file_path, self.__load_spans(file_path), self.__build,
+                               FileStorage.__cache_size)
+        if FileStorage.__streaming and streamable:
+            return {key: self.__build(value) for key, value, _, _ in iter_members(file_path)}
+        return {key: self.__build(value) for key, value in self.__load_file().items()}
+
+    def __load_spans(self, file_path):
+        """Returns the {key: (start, end)} byte spans of the records of the JSON file.
+
+        They come from the span index ("<file>.spans") if it was saved for
+        the current version of the file; otherwise the file is scanned,
+        decoding every record, and the index saved for the next reload.
+        """
+        version = self.__version(file_path)
+        try:
+            with open(file_path + ".spans", "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index["version"] == list(version):
+                offsets = iter(index["offsets"])
+                return dict(zip(index["keys"], zip(offsets, offsets)))
+        except (OSError, ValueError, KeyError, TypeError):
+            # a missing or stale index is rebuilt by a scan
+            pass
+        spans = {key: (start, end) for key, _, start, end in iter_members(file_path, "latin-1")}
+        self.__save_spans(file_path, spans, version)
+        return spans
+
+    @staticmethod
+    def __save_spans(file_path, spans, version):
+        """Writes the span index of the JSON file at version, if it can.
+
+        The keys and the flattened start and end offsets are stored as two
+        lists, which load much faster than one small list per key.
+        """
+        index_path = file_path + ".spans"
+        tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(json.dumps({"version": version, "keys": list(spans),
+                                       "offsets": [offset for span in spans.values()
+                                                   for offset in span]}))
+            os.replace(tmp_path, index_path)
+        except OSError:
+            # the index only saves a scan: reloading works without it
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __build(self, record):
+        """Returns the object described by a serialized record."""
+        if FileStorage.__class_refs is None:
+            FileStorage.__class_refs = self.classes()
+            if FileStorage.__compact:
+                from models.compact import compact_class
+                FileStorage.__class_refs = {name: compact_class(cls) for name, cls
+                                            in FileStorage.__class_refs.items()}
+        return FileStorage.__class_refs[record["__class__"]](**record)
 
     def attributes(self):
         """Returns the valid attributes and their types for each class."""
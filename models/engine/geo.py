@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Module for the GridIndex class and great-circle helpers."""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def distance_km(latitude, longitude, other_latitude, other_longitude):
+    """Returns the great-circle (haversine) distance between two points in km."""
+    phi, other_phi = math.radians(latitude), math.radians(other_latitude)
+    half_dphi = (other_phi - phi) / 2
+    half_dlambda = math.radians(other_longitude - longitude) / 2
+    a = math.sin(half_dphi) ** 2 + \
+        math.cos(phi) * math.cos(other_phi) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Returns the (south, west, north, east) box around a circle.
+
+    west is greater than east when the box crosses the antimeridian;
+    a circle reaching a pole spans every longitude.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    delta = math.degrees(angle)
+    south, north = latitude - delta, latitude + delta
+    if south <= -90 or north >= 90 or angle >= math.pi / 2:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    ratio = math.sin(angle) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return south, -180.0, north, 180.0
+    delta = math.degrees(math.asin(ratio))
+    west = (longitude - delta + 180) % 360 - 180
+    east = (longitude + delta + 180) % 360 - 180
+    return south, west, north, east
+
+
+class GridIndex:
+    """Buckets the keys of located objects into the cells of a latitude/longitude grid.
+
+    The coordinates are kept along with each key, so that queries test
+    points without building the objects. An object whose latitude or
+    longitude was never set on it, or is not a number in range, is not
+    indexed: the class defaults are no location.
+
+    Attributes:
+        attributes (tuple): The (latitude, longitude) attribute names.
+        cell_degrees (float): The side of a grid cell in degrees.
+    """
+
+    def __init__(self, latitude="latitude", longitude="longitude", cell_degrees=0.05):
+        """Initializes an empty index over the latitude and longitude attributes."""
+        self.attributes = (latitude, longitude)
+        self.cell_degrees = cell_degrees
+        self.__columns = math.ceil(360 / cell_degrees)
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns the number of indexed keys."""
+        return len(self.__points)
+
+    def __location(self, obj):
+        """Returns the (latitude, longitude) of obj, or None."""
+        attributes = obj.__dict__
+        latitude = attributes.get(self.attributes[0])
+        longitude = attributes.get(self.attributes[1])
+        if type(latitude) not in (float, int) or type(longitude) not in (float, int):
+            return None
+        # also false for NaN
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+        return float(latitude), float(longitude)
+
+    def __cell(self, latitude, longitude):
+        """Returns the (row, column) of the cell holding a point."""
+        return (math.floor((latitude + 90) / self.cell_degrees),
+                math.floor((longitude + 180) / self.cell_degrees) % self.__columns)
+
+    def add(self, key, obj):
+        """Indexes obj under key."""
+        location = self.__location(obj)
+        if location is None:
+            return
+        cell = self.__cell(*location)
+        self.__points[key] = cell
+        self.__cells.setdefault(cell, {})[key] = location
+
+    def remove(self, key):
+        """Drops key from the index."""
+        cell = self.__points.pop(key, None)
+        if cell is not None:
+            points = self.__cells[cell]
+            del points[key]
+            if not points:
+                del self.__cells[cell]
+
+    def update(self, key, obj):
+        """Re-indexes obj if it moved."""
+        cell = self.__points.get(key)
+        if cell is None or self.__cells[cell].get(key) != self.__location(obj):
+            self.remove(key)
+            self.add(key, obj)
+
+    def within(self, south, west, north, east):
+        """Yields (key, latitude, longitude) for the points inside a box.
+
+        The box is inclusive; west greater than east makes it cross the
+        antimeridian.
+        """
+        south, north = max(south, -90.0), min(north, 90.0)
+        if south > north:
+            return
+        crosses = west > east
+        rows = range(self.__cell(south, 0)[0], self.__cell(north, 0)[0] + 1)
+        first, last = self.__cell(0, west)[1], self.__cell(0, east)[1]
+        if east >= 180:
+            last = self.__columns - 1
+        if crosses:
+            columns = list(range(first, self.__columns)) + list(range(0, last + 1))
+        else:
+            columns = range(first, last + 1)
+        cells = self.__cells
+        # the points are copied before yielding any, so that the caller may
+        # go on while other threads index objects
+        if len(rows) * len(columns) > len(cells):
+            # a wide box: visit the occupied cells rather than every cell in it
+            wanted = set(columns)
+            found = [list(points.items()) for (row, column), points in list(cells.items())
+                     if row in rows and column in wanted]
+        else:
+            found = [list(points.items()) for points in
+                     (cells.get((row, column)) for row in rows for column in columns)
+                     if points is not None]
+        for points in found:
+            for key, (latitude, longitude) in points:
+                if south <= latitude <= north and (
+                        west <= longitude or longitude <= east if crosses
+                        else west <= longitude <= east):
+                    yield key, latitude, longitude
+
+    def near(self, latitude, longitude, radius_km):
+        """Returns the [(distance_km, key)] of the points within radius_km, nearest first."""
+        if radius_km < 0:
+            return []
+        # compare the haversine term, monotonic in the distance, to its
+        # value at radius_km; distance_km() inlined for speed
+        sin, cos, radians = math.sin, math.cos, math.radians
+        phi = radians(latitude)
+        cos_phi = cos(phi)
+        limit = sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+        found = []
+        for key, other_latitude, other_longitude in self.within(
+                *bounding_box(latitude, longitude, radius_km)):
+            other_phi = radians(other_latitude)
+            a = sin((other_phi - phi) / 2) ** 2 + cos_phi * cos(other_phi) * \
+                sin(radians(other_longitude - longitude) / 2) ** 2
+            if a <= limit:
+                found.append((a, key))
+        found.sort()
+        return [(2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))), key)
+                for a, key in found]
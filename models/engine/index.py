@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Module for the AttributeIndex class."""
+
+
+class AttributeIndex:
+    """Maps the values of one attribute to the keys of the objects holding them.
+
+    Only keys are kept, so that the index does not hold objects that a
+    bounded cache has dropped. List values (such as Place.amenity_ids) are indexed under each of
+    their items.
+
+    Attributes:
+        attribute (str): The indexed attribute name.
+        attributes (tuple): The attribute names a change of which re-indexes.
+    """
+
+    def __init__(self, attribute):
+        """Initializes an empty index over attribute."""
+        self.attribute = attribute
+        self.attributes = (attribute,)
+        self.__buckets = {}
+        self.__values = {}
+
+    def __values_of(self, obj):
+        """Returns the tuple of index values held by obj."""
+        value = getattr(obj, self.attribute, None)
+        if isinstance(value, list):
+            return tuple(item for item in value if item.__hash__ is not None)
+        if value.__hash__ is None:
+            return ()
+        return (value,)
+
+    def add(self, key, obj):
+        """Indexes obj under key."""
+        values = self.__values_of(obj)
+        self.__values[key] = values
+        for value in values:
+            self.__buckets.setdefault(value, {})[key] = None
+
+    def remove(self, key):
+        """Drops key from the index."""
+        for value in self.__values.pop(key, ()):
+            bucket = self.__buckets.get(value)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self.__buckets[value]
+
+    def update(self, key, obj):
+        """Re-indexes obj if its attribute value changed."""
+        if self.__values.get(key) != self.__values_of(obj):
+            self.remove(key)
+            self.add(key, obj)
+
+    def get(self, value):
+        """Returns the {key: None} dictionary of the keys of objects holding value."""
+        return self.__buckets.get(value, {})
+
+    def values(self):
+        """Returns the distinct indexed values."""
+        return self.__buckets.keys()
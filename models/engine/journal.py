@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""Module for the Journal class."""
+import json
+import os
+import threading
+
+
+class Journal:
+    """Append-only log of the records changed since the last snapshot.
+
+    Every line is a JSON array ``[key, record]`` where ``record`` is the
+    serialized object, or ``null`` when the object was deleted. Compaction
+    seals the active log and folds it into the snapshot on a background
+    thread while new writes keep going to a fresh log.
+
+    Attributes:
+        path (str): The active log file.
+        sealed_path (str): The log segment waiting to be compacted.
+        entries (int): Number of records in the active log.
+    """
+
+    def __init__(self, path):
+        """Initializes a journal stored at path."""
+        self.path = path
+        self.sealed_path = path + ".1"
+        self.entries = 0
+        self.__compactor = None
+        self.__lock = threading.Lock()
+
+    def append(self, records, sync=None):
+        """Appends (key, record) pairs to the active log.
+
+        Args:
+            records: iterable of (key, record) pairs.
+            sync: optional callable given the open log file after writing.
+
+        Returns:
+            int: the number of bytes appended.
+        """
+        lines = ["{}\n".format(json.dumps([key, record]))
+                 for key, record in records]
+        if not lines:
+            return 0
+        data = "".join(lines).encode("utf-8")
+        with open(self.path, "a+b") as file:
+            # drop a torn line left by a crash mid-append, so that the
+            # new records do not continue it and get lost on replay
+            file.truncate(self.__complete_size(file))
+            file.write(data)
+            if sync is not None:
+                sync(file)
+        self.entries += len(lines)
+        return len(data)
+
+    @staticmethod
+    def __complete_size(file, chunk_size=4096):
+        """Returns the size of file up to the end of its last complete line."""
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return 0
+
+    def exists(self):
+        """Returns True if there is any log left to replay."""
+        return os.path.isfile(self.path) or os.path.isfile(self.sealed_path)
+
+    def records(self):
+        """Yields the (key, record) pairs of the sealed, then the active log."""
+        self.entries = 0
+        for key, record in self.read(self.sealed_path):
+            yield key, record
+        for key, record in self.read(self.path):
+            self.entries += 1
+            yield key, record
+
+    def replay(self, data):
+        """Applies the sealed log, then the active log, onto data."""
+        for key, record in self.records():
+            if record is None:
+                data.pop(key, None)
+            else:
+                data[key] = record
+        return data
+
+    @staticmethod
+    def read(path):
+        """Yields the (key, record) pairs stored in the log at path."""
+        if not os.path.isfile(path):
+            return
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    key, record = json.loads(line)
+                except ValueError:
+                    # a torn last line left by a crash mid-append
+                    break
+                yield key, record
+
+    def compact(self, load, dump, wait=False):
+        """Folds the active log into the snapshot in the background.
+
+        Args:
+            load: callable returning the snapshot as a dict of records.
+            dump: callable writing a dict of records as the new snapshot.
+            wait (bool): block until the compaction has finished.
+        """
+        with self.__lock:
+            if self.__compactor is None or not self.__compactor.is_alive():
+                if not os.path.isfile(self.sealed_path):
+                    if not os.path.isfile(self.path):
+                        return
+                    os.replace(self.path, self.sealed_path)
+                    self.entries = 0
+                self.__compactor = threading.Thread(
+                    target=self.__fold, args=(load, dump), daemon=True)
+                self.__compactor.start()
+        if wait:
+            self.wait()
+
+    def __fold(self, load, dump):
+        """Writes the snapshot with the sealed log applied, then drops it."""
+        data = load()
+        for key, record in self.read(self.sealed_path):
+            if record is None:
+                data.pop(key, None)
+            else:
+                data[key] = record
+        dump(data)
+        os.remove(self.sealed_path)
+
+    def wait(self):
+        """Blocks until a running compaction has finished."""
+        compactor = self.__compactor
+        if compactor is not None:
+            compactor.join()
+
+    def discard(self):
+        """Removes every log once a full snapshot supersedes them."""
+        self.wait()
+        for path in (self.sealed_path, self.path):
+            if os.path.isfile(path):
+                os.remove(path)
+        self.entries = 0
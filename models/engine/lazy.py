@@ -0,0 +1,248 @@
+#!/usr/bin/python3
+"""Module for the LazyObjects class."""
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class LazyObjects(MutableMapping):
+    """Dictionary of stored objects that builds each one on first access.
+
+    Until then an object is only known by its key and the byte span of
+    its record in the file, which stays memory-mapped so that the spans
+    remain valid even if the file is replaced on disk. Records are JSON
+    by default; another decode function may read them straight from the
+    mapping.
+
+    The span of a built object is kept while its record on disk is
+    current, so raw() can still return its bytes; objects that were
+    added, replaced or pin()ned since the file was written have no
+    current record. With a capacity, at most that many built objects are
+    kept: the least recently used one with a current record is dropped
+    and built again from its span on the next access, and the others
+    stay resident until they are written again.
+
+    Building an object and reading the file are done under a lock, so
+    that threads may access the mapping concurrently; loaded objects are
+    returned without locking.
+    """
+
+    def __init__(self, path, spans, build, capacity=0, decode=None):
+        """Initializes the mapping.
+
+        Args:
+            path (str): the file holding the records.
+            spans (dict): {key: (start, end)} byte offsets of each record.
+            build: callable turning a record dictionary into an object.
+            capacity (int): most built objects to keep; 0 keeps them all.
+            decode: callable turning a memoryview of a record into a
+                dictionary; JSON by default.
+        """
+        self.__build = build
+        self.__decode = decode or (lambda view: json.loads(bytes(view)))
+        self.__capacity = capacity
+        self.__lock = threading.RLock()
+        self.__loaded = OrderedDict()
+        self.__clean = {}
+        self.__map = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rebase(path, spans)
+
+    def rebase(self, path, spans, dirty=()):
+        """Points the keys at their records in another file.
+
+        Loaded keys with a span become evictable again, unless they are
+        in dirty, the keys changed since the file was written.
+        """
+        with self.__lock:
+            self.__open(path)
+            self.__spans = {}
+            self.__clean = {}
+            for key, span in spans.items():
+                if key not in self.__loaded:
+                    self.__spans[key] = span
+                elif key not in dirty:
+                    self.__clean[key] = span
+            self.__evict()
+
+    def update(self, path, spans, dirty=()):
+        """Points some keys at new records in path, leaving the others as they are.
+
+        A span of None removes the key. A loaded key not in dirty is
+        dropped, to be built again from its new record.
+        """
+        with self.__lock:
+            self.__open(path)
+            for key, span in spans.items():
+                if key in dirty:
+                    continue
+                self.__loaded.pop(key, None)
+                self.__clean.pop(key, None)
+                if span is None:
+                    self.__spans.pop(key, None)
+                else:
+                    self.__spans[key] = span
+
+    def written(self, path, spans, dirty=()):
+        """Records that the given keys were just written at spans in path.
+
+        Loaded keys become evictable again, unless they are in dirty.
+        """
+        with self.__lock:
+            self.__open(path)
+            for key, span in spans.items():
+                if span is None:
+                    continue
+                if key in self.__loaded:
+                    if key not in dirty:
+                        self.__clean[key] = span
+                else:
+                    self.__spans[key] = span
+            self.__evict()
+
+    def __open(self, path):
+        """Maps the file at path, replacing the current mapping."""
+        self.close()
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Unmaps the underlying file."""
+        with self.__lock:
+            if self.__map is not None:
+                self.__map.close()
+                self.__map = None
+
+    def raw(self, key):
+        """Returns the bytes of the record of key if it is current on disk, or None."""
+        with self.__lock:
+            span = self.__spans.get(key) or self.__clean.get(key)
+            if span is None:
+                return None
+            return self.__map[span[0]:span[1]]
+
+    def pin(self, key):
+        """Keeps the loaded object of key resident: its record on disk is stale."""
+        with self.__lock:
+            self.__clean.pop(key, None)
+
+    def restore(self, key, obj):
+        """Keeps obj resident as the changed object of key, like pin().
+
+        obj may have been evicted since it was built: it takes the place
+        of its record, or of an unchanged object built again from it.
+
+        Returns:
+            bool: False if key is not stored or another object of key
+            has changes, in which case nothing is done.
+        """
+        with self.__lock:
+            loaded = self.__loaded.get(key)
+            if loaded is None:
+                if key not in self.__spans:
+                    return False
+                del self.__spans[key]
+            elif loaded is not obj and key not in self.__clean:
+                return False
+            self.__clean.pop(key, None)
+            self.__loaded[key] = obj
+            self.__loaded.move_to_end(key)
+            self.__evict()
+            return True
+
+    def is_loaded(self, key):
+        """Returns True if the object of key has been built."""
+        return key in self.__loaded
+
+    def loaded(self):
+        """Returns the number of objects built so far."""
+        return len(self.__loaded)
+
+    def stats(self):
+        """Returns the cache statistics as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.__capacity,
+            "resident": len(self.__loaded),
+            "stored": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def __evict(self):
+        """Drops least recently used clean objects until within capacity."""
+        excess = len(self.__loaded) - self.__capacity
+        if not self.__capacity or excess <= 0:
+            return
+        for key in list(self.__loaded):
+            if key in self.__clean:
+                del self.__loaded[key]
+                self.__spans[key] = self.__clean.pop(key)
+                self.evictions += 1
+                excess -= 1
+                if not excess:
+                    return
+
+    def __getitem__(self, key):
+        """Returns the object stored under key, building it if needed."""
+        obj = self.__loaded.get(key)
+        if obj is not None:
+            self.hits += 1
+            if self.__capacity:
+                try:
+                    self.__loaded.move_to_end(key)
+                except KeyError:
+                    # evicted meanwhile by another thread
+                    pass
+            return obj
+        with self.__lock:
+            if key in self.__loaded:
+                return self.__loaded[key]
+            span = self.__spans.get(key)
+            if span is None:
+                raise KeyError(key)
+            self.misses += 1
+            with memoryview(self.__map) as data, data[span[0]:span[1]] as view:
+                obj = self.__build(self.__decode(view))
+            del self.__spans[key]
+            self.__loaded[key] = obj
+            self.__clean[key] = span
+            self.__evict()
+            return obj
+
+    def __setitem__(self, key, obj):
+        """Stores obj under key."""
+        with self.__lock:
+            self.__spans.pop(key, None)
+            self.__clean.pop(key, None)
+            self.__loaded[key] = obj
+
+    def __delitem__(self, key):
+        """Removes key without building its object."""
+        with self.__lock:
+            self.__clean.pop(key, None)
+            if key in self.__loaded:
+                del self.__loaded[key]
+            else:
+                del self.__spans[key]
+
+    def __contains__(self, key):
+        """Returns True if key is stored, without building its object."""
+        return key in self.__loaded or key in self.__spans
+
+    def __iter__(self):
+        """Iterates over the keys."""
+        yield from list(self.__loaded)
+        yield from list(self.__spans)
+
+    def __len__(self):
+        """Returns the number of stored keys."""
+        return len(self.__loaded) + len(self.__spans)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Module for the Metrics class and the shared metrics instance."""
+import atexit
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Opt-in call counts, latency histograms, counters and gauges.
+
+    Nothing is recorded until enable() is called; a disabled timer costs
+    one attribute check per call. Timers keep their calls, total and
+    maximum latency and a histogram over the bucket upper bounds (in
+    seconds); counters add up amounts such as bytes written, and gauges
+    keep the last value set, such as the number of stored objects.
+
+    Attributes:
+        enabled (bool): True if calls are being recorded.
+    """
+    buckets = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+    def __init__(self):
+        """Initializes disabled, empty metrics."""
+        self.enabled = False
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def enable(self, enabled=True):
+        """Starts, or with enabled False stops, recording."""
+        self.enabled = bool(enabled)
+
+    def reset(self):
+        """Forgets everything recorded so far."""
+        with self.__lock:
+            self.__timers = {}
+            self.__counters = {}
+            self.__gauges = {}
+
+    def record(self, name, seconds):
+        """Records one call of the timer name that took seconds."""
+        with self.__lock:
+            timer = self.__timers.get(name)
+            if timer is None:
+                timer = self.__timers[name] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            timer[3][i] += 1
+
+    def count(self, name, amount=1):
+        """Adds amount to the counter name, if enabled."""
+        if self.enabled:
+            with self.__lock:
+                self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        """Sets the gauge name to value, if enabled."""
+        if self.enabled:
+            self.__gauges[name] = value
+
+    @contextmanager
+    def timer(self, name):
+        """Records the duration of the with block under the timer name, if enabled."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorates a function to record each of its calls under the timer name."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Returns everything recorded as a JSON-serializable dictionary."""
+        labels = ["<={:g}ms".format(bound * 1000) for bound in self.buckets]
+        labels.append(">{:g}ms".format(self.buckets[-1] * 1000))
+        with self.__lock:
+            timers = {name: {
+                "calls": calls,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / calls,
+                "max_ms": highest * 1000,
+                "histogram": dict(zip(labels, histogram))
+            } for name, (calls, total, highest, histogram) in sorted(self.__timers.items())}
+            return {"timers": timers, "counters": dict(sorted(self.__counters.items())),
+                    "gauges": dict(sorted(self.__gauges.items()))}
+
+    def dump(self, path):
+        """Writes snapshot() to path as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+    def dump_at_exit(self, path):
+        """Enables recording and dumps the metrics to path when the interpreter exits."""
+        self.enable()
+        atexit.register(self.dump, path)
+
+
+metrics = Metrics()
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""Module for the Query class."""
+import heapq
+import operator
+from itertools import islice
+
+
+class Query:
+    """Lazy, chainable query over the objects of one class in a storage.
+
+    Conditions are given as attribute=value or attribute__op=value, where
+    op is one of eq, ne, lt, le, gt, ge, in or contains. Equality on an
+    indexed attribute reads the storage index instead of scanning the
+    class. Nothing runs until the query is iterated, and results are
+    produced one at a time; only order_by() has to see every match. An
+    id equality is answered with storage.get().
+
+    Example:
+        storage.query(Place).where(price_by_night__lt=100, city_id=city.id)
+                            .order_by("-price_by_night").limit(50)
+    """
+    operators = {
+        "eq": operator.eq,
+        "ne": operator.ne,
+        "lt": operator.lt,
+        "le": operator.le,
+        "gt": operator.gt,
+        "ge": operator.ge,
+        "in": lambda value, choices: value in choices,
+        "contains": lambda value, item: item in value
+    }
+
+    def __init__(self, storage, cls):
+        """Initializes a query matching every object of cls in storage."""
+        self.__storage = storage
+        self.__name = cls if isinstance(cls, str) else cls.__name__
+        self.__filters = ()
+        self.__order = ()
+        self.__offset = 0
+        self.__limit = None
+        self.__fields = None
+
+    def __copy(self, **changes):
+        """Returns a copy of the query with some private fields changed."""
+        query = Query(self.__storage, self.__name)
+        query.__filters = self.__filters
+        query.__order = self.__order
+        query.__offset = self.__offset
+        query.__limit = self.__limit
+        query.__fields = self.__fields
+        for name, value in changes.items():
+            setattr(query, "_Query__" + name, value)
+        return query
+
+    def where(self, **conditions):
+        """Returns the query narrowed by the given conditions."""
+        filters = list(self.__filters)
+        for condition, value in conditions.items():
+            attribute, _, name = condition.partition("__")
+            name = name or "eq"
+            if name not in Query.operators:
+                raise ValueError("Unknown operator: {}".format(name))
+            filters.append((attribute, name, value))
+        return self.__copy(filters=tuple(filters))
+
+    def order_by(self, *attributes):
+        """Returns the query sorted by attributes; prefix one with - to reverse it."""
+        return self.__copy(order=self.__order + attributes)
+
+    def offset(self, count):
+        """Returns the query skipping its first count results."""
+        return self.__copy(offset=count)
+
+    def limit(self, count):
+        """Returns the query stopping after count results."""
+        return self.__copy(limit=count)
+
+    def only(self, *fields):
+        """Returns the query yielding {field: value} dictionaries instead of objects."""
+        return self.__copy(fields=fields)
+
+    def __candidates(self):
+        """Returns the objects to test, from the smallest usable index if any."""
+        best = None
+        for attribute, name, value in self.__filters:
+            if name == "eq" and attribute == "id":
+                obj = self.__storage.get(self.__name, value)
+                return iter([] if obj is None else [obj])
+            if name == "eq" and value.__hash__ is not None and \
+                    self.__storage.has_index(self.__name, attribute):
+                found = self.__storage.lookup(self.__name, attribute, value)
+                if best is None or len(found) < len(best):
+                    best = found
+        if best is None:
+            return self.__storage.objects(self.__name)
+        return iter(best)
+
+    def __matches(self, obj):
+        """Returns True if obj satisfies every condition."""
+        for attribute, name, value in self.__filters:
+            try:
+                if not Query.operators[name](getattr(obj, attribute, None), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    @staticmethod
+    def __sort_key(attribute):
+        """Returns a sort key on attribute that orders missing values first."""
+        def key(obj):
+            value = getattr(obj, attribute, None)
+            return (value is not None, value)
+        return key
+
+    def __sorted(self, objects):
+        """Returns objects in the requested order."""
+        order = [(attribute.lstrip("-"), attribute.startswith("-")) for attribute in self.__order]
+        directions = {descending for _, descending in order}
+        if self.__limit is not None and len(directions) == 1:
+            count = self.__offset + self.__limit
+            keys = [self.__sort_key(attribute) for attribute, _ in order]
+
+            def key(obj):
+                return tuple(sort_key(obj) for sort_key in keys)
+            pick = heapq.nlargest if directions.pop() else heapq.nsmallest
+            return pick(count, objects, key=key)
+        objects = list(objects)
+        for attribute, descending in reversed(order):
+            objects.sort(key=self.__sort_key(attribute), reverse=descending)
+        return objects
+
+    def __iter__(self):
+        """Yields the matching objects, or dictionaries if only() was used."""
+        results = filter(self.__matches, self.__candidates())
+        if self.__order:
+            results = self.__sorted(results)
+        stop = None if self.__limit is None else self.__offset + self.__limit
+        results = islice(results, self.__offset, stop)
+        if self.__fields is None:
+            return results
+        fields = self.__fields
+        return ({field: getattr(obj, field, None) for field in fields} for obj in results)
+
+    def all(self):
+        """Returns the results as a list."""
+        return list(self)
+
+    def first(self):
+        """Returns the first result, or None."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """Returns the number of results."""
+        return sum(1 for _ in self)
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+"""Module for the RecordFile class.
+
+A record file stores each object as its own entry, so that one object
+can be read, written or deleted without touching the others.
+
+Usage: python3 -m models.engine.records {compact,info} PATH [--codec json]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from models.engine.serializers import codecs, get_codec
+
+
+class RecordFile:
+    """Append-only data file of records plus a persisted key index.
+
+    The data file ("<path>.records") starts with a magic number and a
+    generation, followed by entries: a header (key length, payload
+    length, live flag), the UTF-8 key and the record encoded with the
+    codec. Saving a record appends a new entry; deleting one appends a
+    tombstone, an entry with no payload. The index ("<path>.index") maps
+    every live key to the (start, end) byte span of its payload and
+    notes the data size and generation it covers, so only the entries
+    appended after it are scanned on load. Compaction rewrites the live
+    records into a new data file of the next generation.
+
+    Attributes:
+        data_path (str): The data file.
+        index_path (str): The index file.
+        codec: The serializers codec of the payloads.
+        spans (dict): {key: (start, end)} payload spans of live records.
+        size (int): Bytes of complete entries in the data file.
+        generation (int): Generation of the data file.
+    """
+    magic = b"HBR1"
+    file_header = struct.Struct("<4sQ")
+    entry_header = struct.Struct("<IIB")
+
+    def __init__(self, path, codec="json"):
+        """Initializes the record file of the store at path."""
+        self.data_path = path + ".records"
+        self.index_path = path + ".index"
+        self.codec = get_codec(codec)
+        self.spans = {}
+        self.size = 0
+        self.generation = 0
+        self.__covered = 0
+
+    def exists(self):
+        """Returns True if the data file exists."""
+        return os.path.isfile(self.data_path)
+
+    def load(self):
+        """Reads the index, then the entries appended after it.
+
+        Returns:
+            dict: the {key: (start, end)} spans of the live records.
+        """
+        self.spans, self.size, self.generation, self.__covered = {}, 0, 0, 0
+        if not self.exists():
+            return self.spans
+        self.generation = self.__read_generation()
+        self.size = self.__covered = self.file_header.size
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index["generation"] == self.generation and \
+                    index["size"] <= os.path.getsize(self.data_path):
+                self.spans = {key: tuple(span) for key, span in index["records"].items()}
+                self.size = self.__covered = index["size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # a missing or stale index is rebuilt from the entries
+            pass
+        self.refresh()
+        return self.spans
+
+    def refresh(self):
+        """Reads the entries appended since the last load, refresh or append.
+
+        Returns:
+            dict: {key: (start, end) or None} for the keys that changed,
+            None marking a deletion. After a compaction by another
+            process, every key whose span moved is returned.
+        """
+        if not self.exists():
+            return {}
+        if self.__read_generation() != self.generation:
+            previous = self.spans
+            self.load()
+            changed = {key: span for key, span in self.spans.items()
+                       if previous.get(key) != span}
+            changed.update({key: None for key in previous if key not in self.spans})
+            return changed
+        changed = {}
+        for key, span, end in self.__scan(max(self.size, self.file_header.size)):
+            changed[key] = span
+            if span is None:
+                self.spans.pop(key, None)
+            else:
+                self.spans[key] = span
+            self.size = end
+        return changed
+
+    def append(self, records, sync=None):
+        """Appends an entry for each (key, record) pair; None deletes the key.
+
+        Args:
+            records: iterable of (key, record or None) pairs.
+            sync: optional callable given the open data file after writing.
+
+        Returns:
+            dict: {key: (start, end) or None} for the keys written.
+        """
+        if self.size < self.file_header.size:
+            if self.exists() and os.path.getsize(self.data_path) >= self.file_header.size:
+                self.load()
+            else:
+                self.__create(self.generation)
+        entries, written = [], {}
+        offset = self.size
+        for key, record in records:
+            name = key.encode()
+            payload = b"" if record is None else self.codec.dumps(record)
+            entries.append(self.entry_header.pack(len(name), len(payload), record is not None))
+            entries.append(name)
+            entries.append(payload)
+            start = offset + self.entry_header.size + len(name)
+            offset = start + len(payload)
+            written[key] = None if record is None else (start, offset)
+        if not written:
+            return written
+        with open(self.data_path, "r+b") as file:
+            file.seek(self.size)
+            # drop a torn entry left by a crash mid-append
+            file.truncate()
+            file.writelines(entries)
+            if sync is not None:
+                sync(file)
+        self.size = offset
+        for key, span in written.items():
+            if span is None:
+                self.spans.pop(key, None)
+            else:
+                self.spans[key] = span
+        return written
+
+    def read(self, key):
+        """Returns the record of key decoded from the data file."""
+        start, end = self.spans[key]
+        with open(self.data_path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                memoryview(data) as view, view[start:end] as record:
+            return self.codec.loads(record)
+
+    def unindexed(self):
+        """Returns the bytes of entries appended since the index was saved."""
+        return self.size - self.__covered
+
+    def save_index(self):
+        """Atomically writes the index of the live records."""
+        index = {"generation": self.generation, "size": self.size, "records": self.spans}
+        self.__replace(self.index_path, lambda file: file.write(json.dumps(index).encode()))
+        self.__covered = self.size
+
+    def compact(self):
+        """Rewrites the live records into a new data file and saves its index.
+
+        Returns:
+            int: the bytes reclaimed.
+        """
+        before = os.path.getsize(self.data_path) if self.exists() else 0
+        spans = {}
+
+        def write(file):
+            offset = file.write(self.file_header.pack(self.magic, self.generation + 1))
+            with open(self.data_path, "rb") as source, \
+                    mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for key, (start, end) in self.spans.items():
+                    name = key.encode()
+                    offset += file.write(self.entry_header.pack(len(name), end - start, True))
+                    offset += file.write(name)
+                    spans[key] = (offset, offset + end - start)
+                    offset += file.write(data[start:end])
+            return offset
+
+        if self.spans:
+            size = self.__replace(self.data_path, write)
+        else:
+            size = self.__create(self.generation + 1)
+        self.spans, self.size = spans, size
+        self.generation += 1
+        self.save_index()
+        return before - size
+
+    def __create(self, generation):
+        """Starts an empty data file of generation; returns its size."""
+        header = self.file_header.pack(self.magic, generation)
+        self.__replace(self.data_path, lambda file: file.write(header))
+        self.size = len(header)
+        return self.size
+
+    def __read_generation(self):
+        """Returns the generation written in the data file header."""
+        with open(self.data_path, "rb") as file:
+            header = file.read(self.file_header.size)
+        if len(header) < self.file_header.size:
+            return self.generation
+        magic, generation = self.file_header.unpack(header)
+        if magic != self.magic:
+            raise ValueError("{} is not a record file".format(self.data_path))
+        return generation
+
+    def __scan(self, start):
+        """Yields (key, span or None, end) for the complete entries after start."""
+        size = os.path.getsize(self.data_path)
+        if size <= start:
+            return
+        header = self.entry_header
+        with open(self.data_path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = start
+            while offset + header.size <= size:
+                key_length, length, live = header.unpack_from(data, offset)
+                key_start = offset + header.size
+                end = key_start + key_length + length
+                if end > size:
+                    break
+                key = data[key_start:key_start + key_length].decode()
+                yield key, (end - length, end) if live else None, end
+                offset = end
+
+    @staticmethod
+    def __replace(path, write):
+        """Atomically replaces path with what write(file) writes; returns its size."""
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            with open(tmp_path, "wb") as file:
+                write(file)
+                size = file.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+
+def main():
+    """Compacts or describes a record file from the command line."""
+    parser = argparse.ArgumentParser(description="Maintain a storage record file offline.")
+    parser.add_argument("command", choices=("compact", "info"))
+    parser.add_argument("path", help="the store path, such as file.json")
+    parser.add_argument("--codec", default="json", choices=sorted(codecs))
+    args = parser.parse_args()
+    records = RecordFile(args.path, args.codec)
+    records.load()
+    if args.command == "compact":
+        print("{} records, {} bytes reclaimed".format(len(records.spans), records.compact()))
+    else:
+        print("{} records, {} bytes, generation {}".format(
+            len(records.spans), records.size, records.generation))
+
+
+if __name__ == "__main__":
+    main()
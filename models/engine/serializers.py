@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""Serialization formats for the FileStorage file.
+
+Each codec turns the {key: record} dictionary of a store into a file and
+back, and a single record into bytes and back for the record files of
+models.engine.records. JSON is the default; the binary codecs only use the standard
+library. pickle and marshal files must come from a trusted source, and
+marshal files are only readable by the Python version that wrote them.
+
+Usage: python3 -m models.engine.serializers SOURCE TARGET --from json --to pickle
+"""
+import argparse
+import json
+import marshal
+import pickle
+
+
+class JSONCodec:
+    """Text JSON, as written by json.dump."""
+    name = "json"
+    binary = False
+
+    def dump(self, records, file):
+        """Writes records to file."""
+        json.dump(records, file)
+
+    def load(self, file):
+        """Returns the records read from file."""
+        return json.load(file)
+
+    def dumps(self, record):
+        """Returns record encoded as bytes."""
+        return json.dumps(record).encode()
+
+    def loads(self, buffer):
+        """Returns the record encoded in a bytes-like buffer."""
+        # json only reads bytes and str, so a memoryview is copied once
+        return json.loads(bytes(buffer))
+
+
+class PickleCodec:
+    """Binary pickle, protocol 5."""
+    name = "pickle"
+    binary = True
+
+    def dump(self, records, file):
+        """Writes records to file."""
+        pickle.dump(records, file, protocol=5)
+
+    def load(self, file):
+        """Returns the records read from file."""
+        try:
+            return pickle.load(file)
+        except (pickle.UnpicklingError, EOFError) as error:
+            raise ValueError(str(error)) from error
+
+    def dumps(self, record):
+        """Returns record encoded as bytes."""
+        return pickle.dumps(record, protocol=5)
+
+    def loads(self, buffer):
+        """Returns the record encoded in a bytes-like buffer, without copying it."""
+        return pickle.loads(buffer)
+
+
+class MarshalCodec:
+    """Binary marshal, the fastest but tied to the Python version."""
+    name = "marshal"
+    binary = True
+
+    def dump(self, records, file):
+        """Writes records to file."""
+        file.write(marshal.dumps(records))
+
+    def load(self, file):
+        """Returns the records read from file."""
+        try:
+            # marshal.load() reads a file object in small steps
+            return marshal.loads(file.read())
+        except (EOFError, TypeError) as error:
+            raise ValueError(str(error)) from error
+
+    def dumps(self, record):
+        """Returns record encoded as bytes."""
+        return marshal.dumps(record)
+
+    def loads(self, buffer):
+        """Returns the record encoded in a bytes-like buffer, without copying it."""
+        return marshal.loads(buffer)
+
+
+codecs = {codec.name: codec for codec in (JSONCodec(), PickleCodec(), MarshalCodec())}
+
+
+def get_codec(name):
+    """Returns the codec called name."""
+    try:
+        return codecs[name]
+    except KeyError:
+        raise ValueError("Unknown codec: {}".format(name)) from None
+
+
+def open_file(path, mode, codec):
+    """Opens path for reading ("r") or writing ("w") in the mode codec needs."""
+    if codec.binary:
+        return open(path, mode + "b")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_file(path, codec="json"):
+    """Returns the records stored at path; picklable for process pools."""
+    codec = get_codec(codec)
+    with open_file(path, "r", codec) as file:
+        return codec.load(file)
+
+
+def convert(source, target, source_codec="json", target_codec="pickle"):
+    """Rewrites the store at source into target with another codec."""
+    records = load_file(source, source_codec)
+    target_codec = get_codec(target_codec)
+    with open_file(target, "w", target_codec) as file:
+        target_codec.dump(records, file)
+    return len(records)
+
+
+def main():
+    """Converts a store file between codecs from the command line."""
+    parser = argparse.ArgumentParser(description="Convert a storage file between codecs.")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--from", dest="source_codec", default="json", choices=sorted(codecs))
+    parser.add_argument("--to", dest="target_codec", default="pickle", choices=sorted(codecs))
+    args = parser.parse_args()
+    count = convert(args.source, args.target, args.source_codec, args.target_codec)
+    print("{} records converted".format(count))
+
+
+if __name__ == "__main__":
+    main()
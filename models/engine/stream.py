@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Incremental parser for the top-level JSON object of a storage file."""
+import json
+import re
+
+
+class JSONStream:
+    """Reads the members of a top-level JSON object one at a time.
+
+    The file is read chunk_size characters at a time, so the whole text
+    never has to sit in memory. Value offsets are character offsets in
+    the file; with the latin-1 encoding they are also byte offsets.
+    """
+    __decoder = json.JSONDecoder()
+    __whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, file, chunk_size=1 << 16):
+        """Initializes a stream over an open text file."""
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__buffer = ""
+        self.__base = 0
+        self.__pos = 0
+
+    def __more(self):
+        """Reads the next chunk; returns False at the end of the file."""
+        chunk = self.__file.read(self.__chunk_size)
+        if not chunk:
+            return False
+        if self.__pos > self.__chunk_size:
+            self.__base += self.__pos
+            self.__buffer = self.__buffer[self.__pos:]
+            self.__pos = 0
+        self.__buffer += chunk
+        return True
+
+    def __peek(self):
+        """Skips whitespace and returns the next character, or '' at the end."""
+        while True:
+            self.__pos = self.__whitespace.match(self.__buffer, self.__pos).end()
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+            if not self.__more():
+                return ""
+
+    def __expect(self, chars):
+        """Consumes the next character, which must be one of chars."""
+        char = self.__peek()
+        if not char or char not in chars:
+            raise ValueError("Expecting one of {!r} at offset {}".format(
+                chars, self.__base + self.__pos))
+        self.__pos += 1
+        return char
+
+    def __decode(self):
+        """Decodes the value at the cursor; returns (value, start, end)."""
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+            except json.JSONDecodeError:
+                if not self.__more():
+                    raise
+                continue
+            # a number ending the buffer may continue in the next chunk
+            if end == len(self.__buffer) and self.__more():
+                continue
+            start = self.__base + self.__pos
+            self.__pos = end
+            return value, start, self.__base + end
+
+    def members(self):
+        """Yields (key, value, start, end) for each member of the object."""
+        self.__expect("{")
+        if self.__peek() == "}":
+            return
+        while True:
+            key = self.__decode()[0]
+            self.__expect(":")
+            value, start, end = self.__decode()
+            yield key, value, start, end
+            if self.__expect(",}") == "}":
+                return
+
+
+def iter_members(path, encoding="utf-8", chunk_size=1 << 16):
+    """Yields (key, value, start, end) for each member of the JSON file at path."""
+    with open(path, "r", encoding=encoding, newline="") as file:
+        yield from JSONStream(file, chunk_size).members()
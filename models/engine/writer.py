@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""Module for the BackgroundWriter class."""
+import threading
+from concurrent.futures import Future
+
+
+class BackgroundWriter:
+    """Runs a write function on a dedicated thread, coalescing requests.
+
+    Every request() made while no write is running is served by the same
+    next write; a request made during a write waits for the one after it,
+    since the running write may have missed its changes.
+
+    Attributes:
+        requests (int): Number of writes requested.
+        writes (int): Number of writes performed.
+    """
+
+    def __init__(self, write, name="storage-writer"):
+        """Initializes a writer calling write() on a thread called name."""
+        self.requests = 0
+        self.writes = 0
+        self.__write = write
+        self.__name = name
+        self.__waiting = []
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def request(self):
+        """Asks for a write and returns a Future resolved once it is done."""
+        future = Future()
+        with self.__condition:
+            self.__waiting.append(future)
+            self.requests += 1
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__thread = threading.Thread(
+                    target=self.__run, name=self.__name, daemon=True)
+                self.__thread.start()
+            self.__condition.notify()
+        return future
+
+    def __run(self):
+        """Performs one write for every group of waiting requests."""
+        while True:
+            with self.__condition:
+                while not self.__waiting:
+                    self.__condition.wait()
+                waiting, self.__waiting = self.__waiting, []
+            try:
+                self.__write()
+            except BaseException as error:
+                for future in waiting:
+                    future.set_exception(error)
+            else:
+                self.writes += 1
+                for future in waiting:
+                    future.set_result(None)
@@ -1,7 +1,8 @@
 #!/usr/bin/python3
 """Place class."""
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, ListDefault
+from models.relations import Reference, Referrers
 
 
 class Place(BaseModel):
@@ -16,4 +17,8 @@ class Place(BaseModel):
     price_by_night = 0
     latitude = 0.0
     longitude = 0.0
-    amenity_ids = []
+    amenity_ids = ListDefault()
+    city = Reference("City", "city_id")
+    user = Reference("User", "user_id")
+    amenities = Reference("Amenity", "amenity_ids")
+    reviews = Referrers("Review", "place_id", cascade=True)
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Defines the relationship accessors between the model classes.
+
+The classes refer to each other through id attributes, such as
+City.state_id or Place.amenity_ids. A Reference follows one of them to
+the stored object (or objects) it names; Referrers goes the other way,
+listing the stored objects whose id attribute names the owner, through
+the storage attribute index rather than a scan.
+"""
+
+from models import storage
+
+
+class Reference:
+    """
+    Descriptor returning the stored object an id attribute refers to.
+
+    Place.city = Reference("City", "city_id") makes place.city the City
+    whose id is place.city_id, or None. A list of ids, such as
+    Place.amenity_ids, gives the list of the stored objects instead.
+    """
+
+    def __init__(self, cls, attribute):
+        """
+        Initializes the accessor of the cls objects named by attribute.
+        """
+        self.cls = cls
+        self.attribute = attribute
+
+    def __get__(self, obj, owner=None):
+        """
+        Returns the referenced object(s) of obj.
+        """
+        if obj is None:
+            return self
+        value = getattr(obj, self.attribute, None)
+        if isinstance(value, list):
+            found = (storage.get(self.cls, obj_id) for obj_id in value)
+            return [other for other in found if other is not None]
+        return storage.get(self.cls, value) if value else None
+
+
+class Referrers:
+    """
+    Descriptor listing the stored objects whose id attribute names the owner.
+
+    State.cities = Referrers("City", "state_id") makes state.cities the
+    cities whose state_id is state.id; a list attribute such as
+    Place.amenity_ids refers to every id it holds. With cascade, the
+    referrers are destroyed along with the owner by a cascading destroy
+    (see dependents()).
+    """
+
+    def __init__(self, cls, attribute, cascade=False):
+        """
+        Initializes the accessor of the cls objects referring by attribute.
+        """
+        self.cls = cls
+        self.attribute = attribute
+        self.cascade = cascade
+
+    def __get__(self, obj, owner=None):
+        """
+        Returns the list of the objects referring to obj.
+        """
+        if obj is None:
+            return self
+        return storage.lookup(self.cls, self.attribute, obj.id)
+
+
+def relations(cls):
+    """
+    Returns the {name: Referrers} accessors of the class cls.
+    """
+    found = {}
+    for klass in reversed(cls.__mro__):
+        for name, member in vars(klass).items():
+            if isinstance(member, Referrers):
+                found[name] = member
+    return found
+
+
+def dependents(obj):
+    """
+    Returns the objects a cascading destroy of obj also removes.
+
+    The cascade relations are followed transitively, each hop being an
+    index lookup; every object is listed once.
+    """
+    seen = {id(obj)}
+    found = []
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        for accessor in relations(type(current)).values():
+            if not accessor.cascade:
+                continue
+            for other in accessor.__get__(current):
+                if id(other) not in seen:
+                    seen.add(id(other))
+                    found.append(other)
+                    pending.append(other)
+    return found
+
+
+def tree(obj, depth=1):
+    """
+    Returns the dictionary of obj with its referrers nested depth levels deep.
+
+    Each Referrers accessor of obj adds a list under its name, such as
+    "cities" for a State, of the same dictionaries one level shallower.
+    """
+    result = obj.to_dict()
+    if depth > 0:
+        for name, accessor in relations(type(obj)).items():
+            result[name] = [tree(other, depth - 1) for other in accessor.__get__(obj)]
+    return result
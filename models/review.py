@@ -2,6 +2,7 @@
 """Review class."""
 
 from models.base_model import BaseModel
+from models.relations import Reference
 
 
 class Review(BaseModel):
@@ -9,3 +10,5 @@ class Review(BaseModel):
     place_id = ""
     user_id = ""
     text = ""
+    place = Reference("Place", "place_id")
+    user = Reference("User", "user_id")
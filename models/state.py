@@ -2,8 +2,10 @@
 """State class."""
 
 from models.base_model import BaseModel
+from models.relations import Referrers
 
 
 class State(BaseModel):
     """State class."""
     name = ""
+    cities = Referrers("City", "state_id", cascade=True)
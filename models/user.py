@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """User class."""
 from models.base_model import BaseModel
+from models.relations import Referrers
 
 
 class User(BaseModel):
@@ -9,3 +10,5 @@ class User(BaseModel):
     password = ""
     first_name = ""
     last_name = ""
+    places = Referrers("Place", "user_id", cascade=True)
+    reviews = Referrers("Review", "user_id", cascade=True)
@@ -6,10 +6,13 @@ Unittests for the HBNB console.
 import unittest
 from unittest.mock import patch
 from io import StringIO
-from console import HBNBCommand
+from console import HBNBCommand, parse
 from models import storage
 from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.place import Place
 import os
+import json
 
 
 class TestHBNBCommand(unittest.TestCase):
@@ -17,6 +20,7 @@ class TestHBNBCommand(unittest.TestCase):
 
     def setUp(self):
         """Sets up the test environment."""
+        FileStorage._FileStorage__objects = {}
         self.console = HBNBCommand()
 
     def tearDown(self):
@@ -112,6 +116,46 @@ class TestHBNBCommand(unittest.TestCase):
             self.console.onecmd("all NonExistentClass")
             self.assertEqual(output.getvalue().strip(), "** class doesn't exist **")
 
+    def test_all_streaming(self):
+        """Test all command streaming and paging options."""
+        instances = [Place() for _ in range(3)]
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("all Place --stream")
+            lines = output.getvalue().splitlines()
+            for instance in instances:
+                self.assertIn("[Place] ({})".format(instance.id),
+                              [line[:len(instance.id) + 10] for line in lines])
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("Place.all(--json --offset 1 --limit 1)")
+            lines = output.getvalue().splitlines()
+            self.assertEqual(len(lines), 1)
+            self.assertEqual(json.loads(lines[0])["__class__"], "Place")
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("all Place --limit x")
+            self.assertEqual(output.getvalue().strip(), "** invalid limit value **")
+
+    def test_run_batch_flushes_once(self):
+        """Test that batch mode defers saves to one flush at the end."""
+        commands = ["create Place", "create User", "Place.count()", "bogus"]
+        report = StringIO()
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch('sys.stdout', new=StringIO()):
+                timings = self.console.run_batch(commands, report=report)
+            self.assertEqual(flush.call_count, 1)
+        self.assertEqual(timings["create"][0], 2)
+        self.assertEqual(timings["count"][0], 1)
+        self.assertIn("4 commands", report.getvalue())
+
+    def test_run_batch_checkpoints(self):
+        """Test that batch checkpoints flush every N commands."""
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch('sys.stdout', new=StringIO()):
+                self.console.run_batch(["create Place"] * 4, checkpoint=2, report=StringIO())
+            self.assertEqual(flush.call_count, 2)
+
     def test_count(self):
         """Test count command."""
         new_instance1 = BaseModel()
@@ -141,5 +185,144 @@ class TestHBNBCommand(unittest.TestCase):
             self.console.onecmd("update NonExistentClass {} name 'Holberton'".format(instance_id))
             self.assertEqual(output.getvalue().strip(), "** class doesn't exist **")
 
+    def test_where(self):
+        """Test where command."""
+        first, second = Place(), Place()
+        first.price_by_night = 10
+        second.price_by_night = 500
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("Place.where(price_by_night__lt=100)")
+            self.assertIn(first.id, output.getvalue())
+            self.assertNotIn(second.id, output.getvalue())
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('Place.where(order_by="-price_by_night", limit=1)')
+            self.assertEqual(output.getvalue().count("\n"), 1)
+            self.assertIn(second.id, output.getvalue())
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("Place.where(price_by_night__x=1)")
+            self.assertEqual(output.getvalue().strip(), "** invalid conditions **")
+
+        for arguments in ('limit="a"', "limit=-1", "offset=-1", "order_by=5", "order_by=[5]"):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.console.onecmd("Place.where({})".format(arguments))
+                self.assertEqual(output.getvalue().strip(), "** invalid conditions **")
+
+    def test_bulk_commands(self):
+        """Test create_many, update_where and destroy_where."""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('Place.create_many(3, {"name": "Loft", "max_guest": "2"})')
+            ids = output.getvalue().split()
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(storage.get("Place", ids[0]).max_guest, 2)
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('Place.update_where({"id": "%s"}, {"name": "Den"})' % ids[0])
+            self.assertEqual(output.getvalue().strip(), "1")
+        self.assertEqual(storage.get("Place", ids[0]).name, "Den")
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('Place.destroy_where(name="Loft")')
+            self.assertEqual(output.getvalue().strip(), "2")
+        self.assertIsNone(storage.get("Place", ids[1]))
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('Place.create_many("x")')
+            self.assertEqual(output.getvalue().strip(), "** invalid count **")
+
+        for line in ('Place.update_where({"a": 1}, {"number_rooms": [1]})',
+                     'Place.update_where({}, {1: 2})', "Place.create_many(2, {1: 2})"):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.console.onecmd(line)
+                self.assertEqual(output.getvalue().strip(), "** invalid arguments **")
+
+    def test_cache(self):
+        """Test cache command without a lazy store."""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("cache")
+            self.assertEqual(output.getvalue().strip(), "** no object cache **")
+
+    def test_tree_and_cascading_destroy(self):
+        """Test tree nests related objects and destroy --cascade removes them."""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("create State")
+            state_id = output.getvalue().strip()
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('City.create_many(2, state_id="{}")'.format(state_id))
+            city_ids = output.getvalue().split()
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd('State.tree("{}", 1)'.format(state_id))
+            result = json.loads(output.getvalue())
+        self.assertEqual({city["id"] for city in result["cities"]}, set(city_ids))
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("tree State {} deep".format(state_id))
+            self.assertEqual(output.getvalue().strip(), "** invalid depth **")
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("destroy State {} --cascade".format(state_id))
+            self.assertEqual(output.getvalue(), "")
+        self.assertIsNone(storage.get("State", state_id))
+        self.assertIsNone(storage.get("City", city_ids[0]))
+
+    def test_near_and_within(self):
+        """Test the near and within commands."""
+        place = Place()
+        place.latitude, place.longitude = 48.8566, 2.3522
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("Place.near(48.85, 2.35, 5)")
+            self.assertRegex(output.getvalue(), r"^0\.\d{3} \[Place\] \(%s\)" % place.id)
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("within 48 2 49 3")
+            self.assertIn(place.id, output.getvalue())
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("near 48.85 east 5")
+            self.assertEqual(output.getvalue().strip(), "** invalid coordinates **")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("City.near(48.85, 2.35, 5)")
+            self.assertEqual(output.getvalue().strip(), "** only places have a location **")
+
+    def test_stats_and_profile(self):
+        """Test stats records handler calls once metrics are on, and profile."""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("stats")
+            self.assertEqual(output.getvalue().strip(), "** metrics are off **")
+        try:
+            with patch('sys.stdout', new=StringIO()):
+                self.console.onecmd("stats on")
+                self.console.onecmd("create Place")
+                self.console.onecmd("Place.count()")
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.console.onecmd("stats --json")
+                snapshot = json.loads(output.getvalue())
+        finally:
+            self.console.onecmd("stats off")
+            self.console.onecmd("stats reset")
+        self.assertEqual(snapshot["timers"]["console.do_create"]["calls"], 1)
+        self.assertEqual(snapshot["timers"]["console.do_count"]["calls"], 1)
+        self.assertEqual(snapshot["timers"]["storage.new"]["calls"], 1)
+        self.assertGreater(snapshot["counters"]["storage.bytes_written"], 0)
+
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("profile --limit 3 count Place")
+            self.assertIn("cumulative", output.getvalue())
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.console.onecmd("profile --memory all Place")
+            self.assertIn("peak:", output.getvalue())
+
+    def test_parse(self):
+        """Test parse matches shlex tokenizing for simple and quoted input."""
+        self.assertEqual(parse('User 1234 name "John Doe"'),
+                         ["User", "1234", "name", "John Doe"])
+        self.assertEqual(parse('User "1234", "name", "My house"'),
+                         ["User", "1234", "name", "My house"])
+        self.assertEqual(parse("User 1234 name 'it''s'"),
+                         ["User", "1234", "name", "its"])
+        self.assertEqual(parse('User "1234", {"age": 89}'),
+                         ["User", "1234", '{"age": 89}'])
+        self.assertEqual(parse(r'User 1234 name a\ b'), ["User", "1234", "name", "a b"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""
+Unittests for the DBStorage class.
+"""
+
+import unittest
+import os
+import tempfile
+from models.base_model import BaseModel
+from models.place import Place
+from models.city import City
+from models.engine.db_storage import DBStorage
+
+
+class TestDBStorage(unittest.TestCase):
+    """Test cases for the DBStorage class."""
+
+    def setUp(self):
+        """Set up test methods."""
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.storage = DBStorage(self.db_path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Tear down test methods."""
+        self.storage.close()
+        os.remove(self.db_path)
+
+    def reopen(self):
+        """Returns a fresh storage over the same database."""
+        self.storage.close()
+        self.storage = DBStorage(self.db_path)
+        self.storage.reload()
+        return self.storage
+
+    def test_save_and_get(self):
+        """Test that saved objects can be read back by id."""
+        place = Place()
+        place.name = "Loft"
+        place.number_rooms = 3
+        place.amenity_ids = ["a", "b"]
+        place.nickname = "extra"
+        self.storage.new(place)
+        self.storage.save()
+        loaded = self.reopen().get(Place, place.id)
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_all_and_count(self):
+        """Test that all and count can be restricted to one class."""
+        for obj in (BaseModel(), City(), City()):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count("City"), 2)
+        self.assertEqual(len(storage.all(City)), 2)
+        self.assertEqual(len(storage.all()), 3)
+
+    def test_delete(self):
+        """Test that deleted objects are removed from the table."""
+        city = City()
+        self.storage.new(city)
+        self.storage.save()
+        self.storage.delete(city)
+        self.storage.save()
+        self.assertIsNone(self.reopen().get(City, city.id))
+
+    def test_lookup(self):
+        """Test lookups by an indexed column, before commit."""
+        city = City()
+        city.state_id = "s1"
+        self.storage.new(city)
+        found = self.storage.lookup(City, "state_id", "s1")
+        self.assertEqual(found, [city])
+
+    def test_lookup_list_column(self):
+        """Test that a list column matches the values it holds."""
+        place = Place()
+        place.amenity_ids = ["a", "b"]
+        self.storage.new(place)
+        self.storage.save()
+        self.assertEqual(self.reopen().lookup(Place, "amenity_ids", "b")[0].id, place.id)
+        self.assertEqual(self.storage.lookup(Place, "amenity_ids", "c"), [])
+
+    def test_places_near_and_within(self):
+        """Test radius and box searches, including across the antimeridian."""
+        places = []
+        for latitude, longitude in ((48.8566, 2.3522), (51.5074, -0.1278), (0.0, 179.9),
+                                    (0.0, -179.9)):
+            place = Place()
+            place.latitude, place.longitude = latitude, longitude
+            self.storage.new(place)
+            places.append(place)
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual([p.id for p in storage.places_near(48.86, 2.35, 400)],
+                         [places[0].id, places[1].id])
+        self.assertEqual({p.id for p in storage.places_within(-1, 179, 1, -179)},
+                         {places[2].id, places[3].id})
+
+    def test_uncommitted_changes_are_lost(self):
+        """Test that changes are only durable once saved."""
+        self.storage.new(City())
+        self.assertEqual(self.reopen().count(City), 0)
+
+    def test_bulk_operations(self):
+        """Test that bulk insert, update and delete are committed."""
+        places = self.storage.bulk_insert("Place", [{"name": "Loft"}] * 3)
+        self.storage.bulk_update(places[:1], {"max_guest": 4})
+        self.storage.bulk_delete(places[2:])
+        storage = self.reopen()
+        self.assertEqual(storage.count(Place), 2)
+        self.assertEqual(storage.get(Place, places[0].id).max_guest, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
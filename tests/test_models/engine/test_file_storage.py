@@ -3,12 +3,21 @@
 Unittests for the FileStorage class.
 """
 
+import asyncio
+import sys
+import threading
 import unittest
+from unittest.mock import patch
 import os
 import json
 from models.base_model import BaseModel
 from models.user import User
+from models.city import City
+from models.place import Place
 from models.engine.file_storage import FileStorage
+from models.engine.lazy import LazyObjects
+from models.engine.stream import iter_members
+from models.engine.serializers import convert
 
 
 class TestFileStorage(unittest.TestCase):
@@ -17,11 +26,24 @@ class TestFileStorage(unittest.TestCase):
     def setUp(self):
         """Set up test methods."""
         self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty.clear()
         self.file_path = FileStorage._FileStorage__file_path
         self.objects = FileStorage._FileStorage__objects
 
     def tearDown(self):
         """Tear down test methods."""
+        self.storage.configure(journal=False, autoflush_size=0, lazy=False, cache_size=0,
+                               streaming=False, durability="save", codec="json",
+                               sharded=False, workers=0, records=False, fragments=True)
+        FileStorage._FileStorage__journal.discard()
+        for path in (self.file_path + ".records", self.file_path + ".index",
+                     self.file_path + ".spans"):
+            if os.path.exists(path):
+                os.remove(path)
+        for name in self.storage.classes():
+            if os.path.exists(self.storage.shard_path(name)):
+                os.remove(self.storage.shard_path(name))
         try:
             os.remove(self.file_path)
         except Exception:
@@ -101,5 +123,501 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(attributes["BaseModel"]["id"], str)
         self.assertEqual(attributes["User"]["email"], str)
 
+    def test_journal_appends_changes(self):
+        """Test that journal mode appends only the changed records."""
+        self.storage.configure(journal=True)
+        obj = BaseModel()
+        self.storage.save()
+        journal_path = self.file_path + ".journal"
+        self.assertFalse(os.path.exists(self.file_path))
+        obj.name = "Holberton"
+        obj.save()
+        with open(journal_path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        key = "BaseModel.{}".format(obj.id)
+        self.assertEqual([entry[0] for entry in lines], [key, key])
+        self.assertEqual(lines[-1][1]["name"], "Holberton")
+
+    def test_journal_reload_replays_deletes(self):
+        """Test that reload replays journaled updates and deletes."""
+        self.storage.configure(journal=True)
+        kept, gone = BaseModel(), BaseModel()
+        self.storage.save()
+        self.storage.delete(gone)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("BaseModel.{}".format(kept.id), self.storage.all())
+        self.assertNotIn("BaseModel.{}".format(gone.id), self.storage.all())
+
+    def test_journal_append_after_torn_line(self):
+        """Test that records appended after a torn last line survive a reload."""
+        self.storage.configure(journal=True)
+        first = BaseModel()
+        self.storage.save()
+        with open(self.file_path + ".journal", "a", encoding="utf-8") as f:
+            f.write('["BaseModel.torn", {"id"')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        later = [BaseModel() for _ in range(3)]
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(len(self.storage.all()), 4)
+        for obj in [first] + later:
+            self.assertIn("BaseModel.{}".format(obj.id), self.storage.all())
+
+    def test_journal_compact(self):
+        """Test that compaction folds the journal into the JSON file."""
+        self.storage.configure(journal=True)
+        obj = BaseModel()
+        self.storage.save()
+        self.storage.compact(wait=True)
+        self.assertFalse(FileStorage._FileStorage__journal.exists())
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel.{}".format(obj.id), json.load(f))
+
+    def test_setattr_marks_dirty(self):
+        """Test that changing an attribute flags the object as dirty."""
+        obj = BaseModel()
+        self.storage.save()
+        self.assertEqual(self.storage.dirty(), frozenset())
+        obj.name = "Holberton"
+        self.assertIn("BaseModel.{}".format(obj.id), self.storage.dirty())
+
+    def test_batch_defers_save(self):
+        """Test that saves inside a batch are flushed once on exit."""
+        with self.storage.batch():
+            for _ in range(3):
+                BaseModel().save()
+            self.assertFalse(os.path.exists(self.file_path))
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 3)
+        self.assertEqual(self.storage.dirty(), frozenset())
+
+    def test_autoflush_size(self):
+        """Test that reaching autoflush_size dirty keys triggers a flush."""
+        self.storage.configure(autoflush_size=2)
+        BaseModel()
+        self.assertFalse(os.path.exists(self.file_path))
+        BaseModel()
+        self.assertTrue(os.path.exists(self.file_path))
+
+    def test_all_and_count_by_class(self):
+        """Test that all and count can be restricted to one class."""
+        user = User()
+        BaseModel()
+        self.assertEqual(self.storage.all(User), {"User.{}".format(user.id): user})
+        self.assertEqual(self.storage.count("User"), 1)
+        self.assertEqual(self.storage.count(BaseModel), 1)
+        self.storage.delete(user)
+        self.assertEqual(self.storage.count(User), 0)
+
+    def test_lookup_follows_updates(self):
+        """Test that attribute indexes follow updates and deletes."""
+        city = City()
+        city.state_id = "a"
+        self.assertEqual(self.storage.lookup(City, "state_id", "a"), [city])
+        city.state_id = "b"
+        self.assertEqual(self.storage.lookup(City, "state_id", "a"), [])
+        self.assertEqual(self.storage.lookup(City, "state_id", "b"), [city])
+        self.storage.delete(city)
+        self.assertEqual(self.storage.lookup(City, "state_id", "b"), [])
+
+    def test_lookup_after_reload(self):
+        """Test that indexes are rebuilt by reload."""
+        city = City()
+        city.state_id = "a"
+        self.storage.add_index(City, "name")
+        self.storage.save()
+        self.storage.reload()
+        found = self.storage.lookup("City", "state_id", "a")
+        self.assertEqual([obj.id for obj in found], [city.id])
+        self.assertEqual(len(self.storage.lookup("City", "name", "")), 1)
+
+    def test_lazy_reload_builds_on_access(self):
+        """Test that lazy reload only builds the objects that are accessed."""
+        first, second = BaseModel(), User()
+        self.storage.save()
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        objects = self.storage.all()
+        self.assertIsInstance(objects, LazyObjects)
+        self.assertEqual(len(objects), 2)
+        self.assertEqual(objects.loaded(), 0)
+        self.assertEqual(self.storage.get(User, second.id).id, second.id)
+        self.assertEqual(objects.loaded(), 1)
+        self.assertEqual(self.storage.count(BaseModel), 1)
+        self.assertEqual(objects.loaded(), 1)
+
+    def test_lazy_save_keeps_unbuilt_records(self):
+        """Test that saving a lazy store keeps the records never built."""
+        first, second = BaseModel(), BaseModel()
+        first.name = "caf\u00e9"
+        self.storage.save()
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        obj = self.storage.get(BaseModel, second.id)
+        obj.name = "changed"
+        obj.save()
+        self.assertEqual(self.storage.all().loaded(), 1)
+        self.storage.configure(lazy=False)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(BaseModel, first.id).name, "caf\u00e9")
+        self.assertEqual(self.storage.get(BaseModel, second.id).name, "changed")
+
+    def test_lazy_reload_reuses_span_index(self):
+        """Test that a lazy reload of an unchanged file skips the scan."""
+        objs = [BaseModel() for _ in range(3)]
+        self.storage.save()
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        self.assertTrue(os.path.isfile(self.file_path + ".spans"))
+        with patch("models.engine.file_storage.iter_members") as scan:
+            self.storage.reload()
+            scan.assert_not_called()
+        for obj in objs:
+            self.assertEqual(self.storage.get(BaseModel, obj.id).to_dict(), obj.to_dict())
+        self.storage.get(BaseModel, objs[0].id).name = "changed"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(BaseModel, objs[0].id).name, "changed")
+        self.storage.configure(lazy=False)
+        BaseModel().save()
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        self.assertEqual(self.storage.count(), 4)
+
+    def test_lazy_cache_evicts_clean_objects(self):
+        """Test that a bounded lazy store keeps changed objects until saved."""
+        cities = [City() for _ in range(5)]
+        for city in cities:
+            city.state_id = "s"
+        self.storage.save()
+        self.storage.configure(lazy=True, cache_size=2)
+        self.storage.reload()
+        changed = self.storage.get(City, cities[0].id)
+        changed.name = "Paris"
+        for city in cities[1:]:
+            self.assertEqual(self.storage.get(City, city.id).to_dict(), city.to_dict())
+        self.assertIs(self.storage.get(City, cities[0].id), changed)
+        self.assertEqual(len(self.storage.lookup(City, "state_id", "s")), 5)
+        stats = self.storage.cache_stats()
+        self.assertEqual(stats["resident"], 2)
+        self.assertEqual(stats["stored"], 5)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertGreater(stats["hit_rate"], 0)
+        self.storage.save()
+        self.storage.configure(lazy=False)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(City, cities[0].id).name, "Paris")
+        self.assertEqual(self.storage.count(City), 5)
+
+    def test_lazy_cache_keeps_changes_to_evicted_objects(self):
+        """Test that objects changed after their eviction are still saved."""
+        cities = [City() for _ in range(10)]
+        for city in cities:
+            city.state_id = "s"
+        self.storage.save()
+        self.storage.configure(lazy=True, cache_size=3)
+        self.storage.reload()
+        self.assertEqual(self.storage.bulk_update(self.storage.query(City).all(),
+                                                  {"name": "X"}), 10)
+        self.storage.configure(lazy=False)
+        self.storage.reload()
+        self.assertEqual([city.name for city in self.storage.all(City).values()], ["X"] * 10)
+
+    def test_save_serializes_changed_objects_only(self):
+        """Test that a save reuses the cached JSON of unchanged objects."""
+        users = [User() for _ in range(5)]
+        self.storage.save()
+        users[0].first_name = "Betty"
+        with patch.object(User, "to_dict", autospec=True, side_effect=User.to_dict) as to_dict:
+            self.storage.save()
+            self.assertEqual(to_dict.call_count, 1)
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"User." + user.id: user.to_dict() for user in users})
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        self.storage.get(User, users[1].id)
+        with patch.object(User, "to_dict", autospec=True) as to_dict:
+            self.storage.save()
+            to_dict.assert_not_called()
+
+    def test_save_keeps_lists_changed_in_place(self):
+        """Test that a list appended to without setattr() is still saved."""
+        place = Place()
+        place.amenity_ids = ["a"]
+        self.storage.save()
+        place.amenity_ids.append("b")
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["Place." + place.id]["amenity_ids"], ["a", "b"])
+        self.storage.configure(lazy=True)
+        self.storage.reload()
+        loaded = self.storage.get(Place, place.id)
+        self.storage.save()
+        loaded.amenity_ids.append("c")
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["Place." + place.id]["amenity_ids"], ["a", "b", "c"])
+
+    def test_save_drops_objects_removed_outside_storage(self):
+        """Test that keys removed through all() or a replaced table are not written back."""
+        first, second = BaseModel(), BaseModel()
+        self.storage.save()
+        del self.storage.all()["BaseModel." + first.id]
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f)), ["BaseModel." + second.id])
+        FileStorage._FileStorage__objects = {}
+        third = BaseModel()
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f)), ["BaseModel." + third.id])
+
+    def test_places_near_follows_changes(self):
+        """Test that radius and box searches see created, moved and deleted places."""
+        paris, london = Place(), Place()
+        paris.latitude, paris.longitude = 48.8566, 2.3522
+        london.latitude, london.longitude = 51.5074, -0.1278
+        self.assertEqual(self.storage.places_near(48.86, 2.35, 400), [paris, london])
+        self.assertEqual(self.storage.places_near(48.86, 2.35, 400, limit=1), [paris])
+        self.assertEqual(self.storage.places_within(48, 2, 49, 3), [paris])
+        london.longitude = 2.4
+        self.assertEqual(self.storage.places_within(48, 2, 52, 3), [paris, london])
+        rome = Place()
+        rome.latitude, rome.longitude = 41.9028, 12.4964
+        self.assertEqual(self.storage.places_near(41.9, 12.5, 10), [rome])
+        self.storage.delete(rome)
+        self.assertEqual(self.storage.places_near(41.9, 12.5, 10), [])
+        Place()
+        self.assertEqual(self.storage.places_near(0, 0, 10), [])
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual([place.id for place in self.storage.places_near(48.86, 2.35, 10)],
+                         [paris.id])
+
+    def test_records_mode_reads_and_writes_single_records(self):
+        """Test that records mode decodes and appends one record at a time."""
+        users = [User() for _ in range(4)]
+        self.storage.save()
+        self.storage.configure(records=True, codec="pickle")
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(User), 4)
+        self.assertEqual(self.storage.all().loaded(), 0)
+        user = self.storage.get(User, users[0].id)
+        self.assertEqual(user.to_dict(), users[0].to_dict())
+        self.assertEqual(self.storage.all().loaded(), 1)
+        size = os.path.getsize(self.file_path + ".records")
+        self.storage.delete(user)
+        self.storage.save()
+        self.assertLess(os.path.getsize(self.file_path + ".records") - size, 64)
+        self.storage.compact()
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(User, users[0].id))
+        self.assertEqual(self.storage.get(User, users[1].id).id, users[1].id)
+        with self.assertRaises(ValueError):
+            self.storage.configure(journal=True)
+
+    def test_stream_matches_json_load(self):
+        """Test that the streaming parser reads what json.load reads."""
+        for _ in range(20):
+            User().amenity_ids = [1.5, 2, "x"]
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        streamed = {key: value for key, value, _, _ in
+                    iter_members(self.file_path, chunk_size=7)}
+        self.assertEqual(streamed, expected)
+        self.storage.configure(streaming=True)
+        self.storage.reload()
+        self.assertEqual(set(self.storage.all()), set(expected))
+
+    def test_failed_save_keeps_old_file(self):
+        """Test that a save failing midway leaves the previous file intact."""
+        BaseModel()
+        self.storage.save()
+        with open(self.file_path, "rb") as f:
+            before = f.read()
+        BaseModel()
+        with patch("json.dumps", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.storage.save()
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual([name for name in os.listdir(".") if name.endswith(".tmp")], [])
+
+    def test_durability_levels(self):
+        """Test that durability decides when writes are fsynced."""
+        with patch("os.fsync") as fsync:
+            BaseModel()
+            self.storage.save()
+            self.assertTrue(fsync.called)
+            fsync.reset_mock()
+            self.storage.configure(durability="none")
+            self.storage.save()
+            self.assertFalse(fsync.called)
+            self.storage.configure(durability="interval", sync_interval=3600)
+            self.storage.save()
+            self.assertFalse(fsync.called)
+        with self.assertRaises(ValueError):
+            self.storage.configure(durability="sometimes")
+
+    def test_binary_codecs_round_trip(self):
+        """Test that every codec reloads what it saved."""
+        user = User()
+        user.first_name = "Betty"
+        for codec in ("pickle", "marshal", "json"):
+            self.storage.configure(codec=codec)
+            self.storage.save()
+            self.storage.reload()
+            self.assertEqual(self.storage.get(User, user.id).first_name, "Betty")
+
+    def test_convert_between_codecs(self):
+        """Test that convert rewrites a store in another codec."""
+        user = User()
+        self.storage.save()
+        self.assertEqual(convert(self.file_path, self.file_path, "json", "pickle"), 1)
+        self.storage.configure(codec="pickle")
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("User.{}".format(user.id), self.storage.all())
+
+    def test_sharded_save_writes_dirty_shards(self):
+        """Test that a sharded save only rewrites the dirty classes."""
+        self.storage.configure(sharded=True)
+        user, city = User(), City()
+        self.storage.save()
+        self.assertTrue(os.path.exists(self.storage.shard_path(User)))
+        self.assertTrue(os.path.exists(self.storage.shard_path("City")))
+        os.remove(self.storage.shard_path(City))
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.storage.shard_path(City)))
+        with open(self.storage.shard_path(User), "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["User.{}".format(user.id)]["first_name"], "Betty")
+
+    def test_sharded_reload(self):
+        """Test that shards reload in parallel and in process."""
+        user, city = User(), City()
+        self.storage.save()
+        self.storage.configure(sharded=True)
+        self.storage.reload()
+        self.storage.save()
+        os.remove(self.file_path)
+        for workers in (2, 1):
+            self.storage.configure(workers=workers)
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual(set(self.storage.all()),
+                             {"User.{}".format(user.id), "City.{}".format(city.id)})
+        with self.assertRaises(ValueError):
+            self.storage.configure(journal=True)
+
+    def test_bulk_operations_write_once(self):
+        """Test that bulk insert, update and delete each write the file once."""
+        self.storage.configure(autoflush_size=2)
+        with patch.object(self.storage, "flush", wraps=self.storage.flush) as flush:
+            cities = self.storage.bulk_insert(City, [{"state_id": "a"}] * 5)
+            self.assertEqual(flush.call_count, 1)
+            self.assertEqual(self.storage.bulk_update(cities[:2], {"state_id": "b"}), 2)
+            self.assertEqual(flush.call_count, 2)
+            self.assertEqual(self.storage.bulk_delete(cities[3:] + [User(id="unstored")]), 2)
+            self.assertEqual(flush.call_count, 3)
+        self.assertEqual(len(self.storage.lookup(City, "state_id", "b")), 2)
+        self.assertEqual(len(self.storage.lookup(City, "state_id", "a")), 1)
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_asave_and_aiter(self):
+        """Test that asave writes on the writer thread and aiter yields objects."""
+        async def run():
+            users = [User() for _ in range(3)]
+            await asyncio.gather(*(self.storage.asave() for _ in range(5)))
+            return users, [obj async for obj in self.storage.aiter(User, chunk_size=2)]
+        users, found = asyncio.run(run())
+        self.assertEqual(found, users)
+        self.assertEqual(self.storage.dirty(), frozenset())
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_flush_keeps_changes_made_during_write(self):
+        """Test that keys dirtied while a flush runs stay dirty for the next one."""
+        to_dict = BaseModel.to_dict
+
+        def slow_to_dict(obj):
+            User()
+            return to_dict(obj)
+        BaseModel()
+        with patch.object(BaseModel, "to_dict", autospec=True, side_effect=slow_to_dict):
+            self.storage.save()
+        self.assertEqual(len(self.storage.dirty()), 1)
+
+    def test_concurrent_writers_and_saves(self):
+        """Test that threads may create, change and save objects at once."""
+        self.storage.configure(durability="none")
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        errors = []
+        done = threading.Event()
+
+        def create(state_id):
+            try:
+                for _ in range(1000):
+                    city = City()
+                    city.state_id = state_id
+                    self.storage.lookup(City, "state_id", state_id)
+            except Exception as error:
+                errors.append(error)
+
+        def save():
+            try:
+                while not done.is_set():
+                    self.storage.save()
+            except Exception as error:
+                errors.append(error)
+        saver = threading.Thread(target=save)
+        saver.start()
+        threads = [threading.Thread(target=create, args=(str(i),)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        saver.join()
+        self.assertEqual(errors, [])
+        self.storage.save()
+        self.assertEqual(self.storage.count(City), 4000)
+        self.assertEqual(len(self.storage.lookup(City, "state_id", "3")), 1000)
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 4000)
+
+    def test_save_merges_changes_of_other_processes(self):
+        """Test that records changed on disk by another writer are merged."""
+        kept, changed, removed = User(), User(), User()
+        self.storage.save()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        records["User.{}".format(changed.id)]["first_name"] = "Betty"
+        del records["User.{}".format(removed.id)]
+        records["User.other"] = dict(records["User.{}".format(kept.id)], id="other")
+        with open(self.file_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(self.file_path + ".tmp", self.file_path)
+
+        local = City()
+        self.storage.save()
+        self.assertIs(self.storage.get(User, kept.id), kept)
+        self.assertEqual(self.storage.get(User, changed.id).first_name, "Betty")
+        self.assertIsNone(self.storage.get(User, removed.id))
+        self.assertIsNotNone(self.storage.get(User, "other"))
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(set(json.load(f)), {
+                "User.{}".format(kept.id), "User.{}".format(changed.id),
+                "User.other", "City.{}".format(local.id)})
+        self.assertFalse(self.storage.refresh())
+
 if __name__ == "__main__":
     unittest.main()
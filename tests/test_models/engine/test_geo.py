@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Unittests for the GridIndex class.
+"""
+
+import random
+import unittest
+from types import SimpleNamespace
+from models.engine.geo import GridIndex, bounding_box, distance_km
+
+
+class TestGridIndex(unittest.TestCase):
+    """Test cases for the GridIndex class."""
+
+    def setUp(self):
+        """Set up an index over random points, some around the poles and antimeridian."""
+        rand = random.Random(0)
+        self.points = {}
+        for i in range(3000):
+            if i % 3 == 0:
+                latitude, longitude = rand.uniform(-90, 90), rand.uniform(-180, 180)
+            elif i % 3 == 1:
+                latitude, longitude = rand.uniform(85, 90), rand.uniform(-180, 180)
+            else:
+                latitude = rand.uniform(-2, 2)
+                longitude = rand.choice((1, -1)) * rand.uniform(178, 180)
+            self.points["Place.{}".format(i)] = SimpleNamespace(
+                latitude=latitude, longitude=longitude)
+        self.index = GridIndex(cell_degrees=1)
+        for key, point in self.points.items():
+            self.index.add(key, point)
+
+    def brute_near(self, latitude, longitude, radius):
+        """Returns the sorted keys within radius by a full scan."""
+        return sorted((distance_km(latitude, longitude, p.latitude, p.longitude), key)
+                      for key, p in self.points.items()
+                      if distance_km(latitude, longitude, p.latitude, p.longitude) <= radius)
+
+    def test_distance(self):
+        """Test the haversine distance on known points."""
+        self.assertAlmostEqual(distance_km(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(distance_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, places=0)
+        self.assertEqual(bounding_box(89.5, 0, 100)[1:4:2], (-180.0, 180.0))
+
+    def test_near_matches_a_scan(self):
+        """Test radius queries anywhere, including across the antimeridian and poles."""
+        for latitude, longitude, radius in ((0, 179.5, 150), (88, 30, 300), (90, 0, 500),
+                                            (10, -50, 2000), (0, -179.9, 40)):
+            found = self.index.near(latitude, longitude, radius)
+            self.assertEqual([key for _, key in found],
+                             [key for _, key in self.brute_near(latitude, longitude, radius)])
+            for (distance, _), (expected, _) in zip(found, self.brute_near(
+                    latitude, longitude, radius)):
+                self.assertAlmostEqual(distance, expected)
+
+    def test_within_matches_a_scan(self):
+        """Test box queries, including one crossing the antimeridian."""
+        for box in ((-1, 179, 1, -179), (-90, -180, 90, 180), (86, -10, 89, 10)):
+            south, west, north, east = box
+            expected = {key for key, p in self.points.items()
+                        if south <= p.latitude <= north and
+                        (west <= p.longitude <= east if west <= east
+                         else p.longitude >= west or p.longitude <= east)}
+            self.assertEqual({key for key, _, _ in self.index.within(*box)}, expected)
+
+    def test_within_while_indexing(self):
+        """Test that adding points during a box query does not break it."""
+        found = self.index.within(86, -180, 90, 180)
+        _, latitude, longitude = next(found)
+        for i in range(10):
+            self.index.add("Place.new{}".format(i),
+                           SimpleNamespace(latitude=latitude, longitude=longitude))
+        self.assertGreater(len(list(found)), 0)
+
+    def test_update_and_remove(self):
+        """Test that moved, removed and unlocated objects are re-indexed."""
+        point = self.points["Place.0"]
+        point.latitude, point.longitude = 45.0, 45.0
+        self.index.update("Place.0", point)
+        self.assertIn("Place.0", [key for _, key in self.index.near(45, 45, 1)])
+        self.index.remove("Place.0")
+        self.assertNotIn("Place.0", [key for _, key in self.index.near(45, 45, 1)])
+        self.index.add("Place.x", SimpleNamespace(latitude="north", longitude=0.0))
+        self.index.add("Place.y", SimpleNamespace(latitude=float("nan"), longitude=0.0))
+        unlocated = type("Unlocated", (SimpleNamespace,), {"latitude": 0.0, "longitude": 0.0})
+        self.index.add("Place.z", unlocated())
+        self.assertEqual(len(self.index), len(self.points) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Unittests for the Metrics class.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from models.engine.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the Metrics class."""
+
+    def setUp(self):
+        """Set up test methods."""
+        self.metrics = Metrics()
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is recorded until enabled."""
+        double = self.metrics.timed("double")(lambda x: 2 * x)
+        self.assertEqual(double(2), 4)
+        self.metrics.count("bytes", 10)
+        self.metrics.gauge("objects", 3)
+        self.assertEqual(self.metrics.snapshot(),
+                         {"timers": {}, "counters": {}, "gauges": {}})
+
+    def test_timers_counters_and_gauges(self):
+        """Test that calls fall in their histogram buckets."""
+        self.metrics.enable()
+        double = self.metrics.timed("double")(lambda x: 2 * x)
+        double(1)
+        with self.metrics.timer("block"):
+            pass
+        self.metrics.record("block", 0.05)
+        self.metrics.record("block", 5)
+        self.metrics.count("bytes", 10)
+        self.metrics.count("bytes", 5)
+        self.metrics.gauge("objects", 3)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["timers"]["double"]["calls"], 1)
+        block = snapshot["timers"]["block"]
+        self.assertEqual(block["calls"], 3)
+        self.assertEqual(block["max_ms"], 5000)
+        self.assertEqual(block["histogram"]["<=100ms"], 1)
+        self.assertEqual(block["histogram"][">1000ms"], 1)
+        self.assertEqual(sum(block["histogram"].values()), 3)
+        self.assertEqual(snapshot["counters"], {"bytes": 15})
+        self.assertEqual(snapshot["gauges"], {"objects": 3})
+
+    def test_dump_and_reset(self):
+        """Test that dump writes the snapshot and reset clears it."""
+        self.metrics.enable()
+        self.metrics.count("bytes")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            self.metrics.dump(path)
+            with open(path, "r", encoding="utf-8") as file:
+                self.assertEqual(json.load(file)["counters"], {"bytes": 1})
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot()["counters"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
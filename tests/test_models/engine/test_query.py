@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Unittests for the Query class.
+"""
+
+import unittest
+from unittest.mock import patch
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestQuery(unittest.TestCase):
+    """Test cases for the Query class."""
+
+    def setUp(self):
+        """Set up test methods."""
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i in range(6):
+            place = Place()
+            place.price_by_night = i * 50
+            place.city_id = "odd" if i % 2 else "even"
+            self.places.append(place)
+
+    def tearDown(self):
+        """Tear down test methods."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_where_operators(self):
+        """Test equality and comparison conditions."""
+        query = storage.query(Place).where(city_id="odd", price_by_night__ge=100)
+        self.assertEqual({p.price_by_night for p in query}, {150, 250})
+        query = storage.query(Place).where(price_by_night__in=[0, 50])
+        self.assertEqual(query.count(), 2)
+        with self.assertRaises(ValueError):
+            storage.query(Place).where(price_by_night__between=1)
+
+    def test_order_offset_limit(self):
+        """Test ordering, paging and projections."""
+        query = storage.query(Place).order_by("-price_by_night").offset(1).limit(2)
+        self.assertEqual([p.price_by_night for p in query], [200, 150])
+        query = storage.query(Place).order_by("city_id", "-price_by_night")
+        self.assertEqual([p.price_by_night for p in query], [200, 100, 0, 250, 150, 50])
+        first = storage.query("Place").order_by("price_by_night").only("price_by_night").first()
+        self.assertEqual(first, {"price_by_night": 0})
+
+    def test_uses_index(self):
+        """Test that equality on an indexed attribute reads the index."""
+        with patch.object(FileStorage, "objects") as objects:
+            found = storage.query(Place).where(city_id="even").all()
+            self.assertFalse(objects.called)
+        self.assertEqual(len(found), 3)
+        found = storage.query(Place).where(id=self.places[0].id).all()
+        self.assertEqual(found, [self.places[0]])
+
+    def test_results_are_lazy(self):
+        """Test that results are produced one at a time."""
+        results = iter(storage.query(Place))
+        self.assertIn(next(results), self.places)
+
+
+if __name__ == "__main__":
+    unittest.main()
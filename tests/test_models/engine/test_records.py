@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Unittests for the RecordFile class.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from models.engine.records import RecordFile
+
+
+class TestRecordFile(unittest.TestCase):
+    """Test cases for the RecordFile class."""
+
+    def setUp(self):
+        """Set up test methods."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "file.json")
+
+    def tearDown(self):
+        """Tear down test methods."""
+        shutil.rmtree(self.directory)
+
+    def test_append_and_reload(self):
+        """Test that appended records and tombstones survive a reload."""
+        records = RecordFile(self.path, "pickle")
+        records.append([("User.1", {"id": "1"}), ("User.2", {"id": "2"})])
+        records.save_index()
+        records.append([("User.1", None), ("User.2", {"id": "2", "name": "Betty"})])
+        loaded = RecordFile(self.path, "pickle")
+        self.assertEqual(set(loaded.load()), {"User.2"})
+        self.assertEqual(loaded.read("User.2"), {"id": "2", "name": "Betty"})
+        self.assertEqual(loaded.size, records.size)
+
+    def test_torn_entry_is_dropped(self):
+        """Test that a partial last entry is ignored, then overwritten."""
+        records = RecordFile(self.path)
+        records.append([("User.1", {"id": "1"})])
+        with open(records.data_path, "ab") as f:
+            f.write(b"\x07\x00")
+        loaded = RecordFile(self.path)
+        self.assertEqual(set(loaded.load()), {"User.1"})
+        loaded.append([("User.2", {"id": "2"})])
+        self.assertEqual(set(RecordFile(self.path).load()), {"User.1", "User.2"})
+
+    def test_compact(self):
+        """Test that compaction keeps the live records only."""
+        records = RecordFile(self.path)
+        for i in range(10):
+            records.append([("User.1", {"id": "1", "version": i}), ("User.{}".format(i), None)])
+        before = os.path.getsize(records.data_path)
+        self.assertGreater(records.compact(), 0)
+        self.assertLess(os.path.getsize(records.data_path), before)
+        other = RecordFile(self.path)
+        self.assertEqual(other.load(), records.spans)
+        self.assertEqual(other.read("User.1")["version"], 9)
+        self.assertEqual(other.generation, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
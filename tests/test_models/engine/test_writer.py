@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""
+Unittests for the BackgroundWriter class.
+"""
+
+import threading
+import unittest
+from models.engine.writer import BackgroundWriter
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    """Test cases for the BackgroundWriter class."""
+
+    def test_requests_are_coalesced(self):
+        """Test that requests made during a write share the next one."""
+        started, release = threading.Event(), threading.Event()
+
+        def write():
+            started.set()
+            release.wait()
+        writer = BackgroundWriter(write)
+        first = writer.request()
+        started.wait()
+        waiting = [writer.request() for _ in range(10)]
+        release.set()
+        for future in [first] + waiting:
+            future.result(timeout=5)
+        self.assertEqual(writer.requests, 11)
+        self.assertEqual(writer.writes, 2)
+
+    def test_errors_reach_every_request(self):
+        """Test that a failed write raises in every waiting request."""
+        def write():
+            raise OSError("disk full")
+        future = BackgroundWriter(write).request()
+        with self.assertRaises(OSError):
+            future.result(timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,9 @@ Unittests for the BaseModel class.
 import unittest
 from datetime import datetime
 from time import sleep
-from models.base_model import BaseModel
+from models.base_model import BaseModel, parse_datetime
+from models.engine.file_storage import FileStorage
+from models.place import Place
 import uuid
 
 
@@ -118,6 +120,43 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(instance_dict["updated_at"], self.instance.updated_at.isoformat())
         self.assertEqual(instance_dict["__class__"], "BaseModel")
 
+    def test_kwargs_without_microseconds(self):
+        """Test initialization from timestamps without microseconds."""
+        instance_dict = self.instance.to_dict()
+        instance_dict["created_at"] = "2024-05-20T01:15:24"
+        new_instance = BaseModel(**instance_dict)
+        self.assertEqual(new_instance.created_at, datetime(2024, 5, 20, 1, 15, 24))
+
+    def test_parse_datetime_round_trip(self):
+        """Test that parse_datetime reads what isoformat writes."""
+        stamp = datetime(2024, 5, 20, 1, 15, 24, 620773)
+        self.assertEqual(parse_datetime(stamp.isoformat()), stamp)
+        self.assertEqual(parse_datetime(stamp), stamp)
+        with self.assertRaises(ValueError):
+            parse_datetime("not a date")
+
+    def test_list_default_not_shared(self):
+        """Test that list attribute defaults are copied per instance."""
+        first = Place(name="Loft", id="1")
+        second = Place()
+        first.amenity_ids.append("wifi")
+        self.assertEqual(first.amenity_ids, ["wifi"])
+        self.assertEqual(second.amenity_ids, [])
+        self.assertEqual(Place.amenity_ids, [])
+        self.assertEqual(Place(name="Den", id="2").amenity_ids, [])
+
+    def test_list_default_stored_on_change(self):
+        """Test that reading a list default leaves the instance unchanged."""
+        place = Place()
+        before = place.to_dict()
+        ids = place.amenity_ids
+        self.assertEqual(place.to_dict(), before)
+        ids.append("wifi")
+        ids += ["pool"]
+        self.assertEqual(place.to_dict()["amenity_ids"], ["wifi", "pool"])
+        self.assertIs(type(place.amenity_ids), list)
+        self.assertIn("Place." + place.id, FileStorage._FileStorage__dirty)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Unittests for the compact model classes.
+"""
+
+import os
+import unittest
+from models import storage
+from models.compact import compact_class
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestCompactModel(unittest.TestCase):
+    """Test cases for the compact model classes."""
+
+    def setUp(self):
+        """Set up test methods."""
+        self.place = Place()
+        self.place.name = "Loft"
+        self.place.nickname = "extra"
+
+    def tearDown(self):
+        """Tear down test methods."""
+        storage.configure(compact=False)
+        if os.path.isfile("file.json"):
+            os.remove("file.json")
+        FileStorage._FileStorage__objects = {}
+
+    def test_same_name_and_no_instance_dict(self):
+        """Test that compact instances keep the class name but use slots."""
+        compact = compact_class(Place)(**self.place.to_dict())
+        self.assertEqual(type(compact).__name__, "Place")
+        self.assertIs(compact_class(Place), type(compact))
+        self.assertEqual(type(compact).__dictoffset__, 0)
+
+    def test_to_dict_and_str(self):
+        """Test that to_dict and __str__ match the regular instance."""
+        compact = compact_class(Place)(**self.place.to_dict())
+        self.assertEqual(compact.to_dict(), self.place.to_dict())
+        self.assertEqual(str(compact), str(self.place))
+        self.assertEqual(compact.number_rooms, 0)
+
+    def test_list_default_not_shared(self):
+        """Test that list defaults are copied per instance."""
+        cls = compact_class(Place)
+        first = cls(**self.place.to_dict())
+        second = cls(**self.place.to_dict())
+        first.amenity_ids.append("wifi")
+        self.assertEqual(first.to_dict()["amenity_ids"], ["wifi"])
+        self.assertEqual(second.amenity_ids, [])
+        self.assertNotIn("amenity_ids", second.to_dict())
+        self.assertEqual(Place.amenity_ids, [])
+
+    def test_storage_reload_compact(self):
+        """Test that compact reload keeps console-style updates tracked."""
+        storage.save()
+        storage.configure(compact=True)
+        storage.reload()
+        loaded = storage.get(Place, self.place.id)
+        self.assertIs(type(loaded), compact_class(Place))
+        storage.save()
+        loaded.name = "Studio"
+        self.assertIn("Place.{}".format(loaded.id), storage.dirty())
+        self.assertEqual(loaded.to_dict()["name"], "Studio")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Unittests for the relationship accessors.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+from models.amenity import Amenity
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.relations import dependents, tree
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestRelations(unittest.TestCase):
+    """Test cases for the relationship accessors."""
+
+    def setUp(self):
+        """Set up a state with a city, a place, an amenity and a review."""
+        FileStorage._FileStorage__objects = {}
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+        self.user = User()
+        self.amenity = Amenity()
+        self.place = Place()
+        self.place.city_id = self.city.id
+        self.place.user_id = self.user.id
+        self.place.amenity_ids = [self.amenity.id]
+        self.review = Review()
+        self.review.place_id = self.place.id
+        self.review.user_id = self.user.id
+
+    def tearDown(self):
+        """Tear down test methods."""
+        if os.path.isfile("file.json"):
+            os.remove("file.json")
+        FileStorage._FileStorage__objects = {}
+
+    def test_accessors(self):
+        """Test that accessors resolve ids in both directions."""
+        self.assertEqual(self.state.cities, [self.city])
+        self.assertIs(self.city.state, self.state)
+        self.assertEqual(self.city.places, [self.place])
+        self.assertIs(self.place.city, self.city)
+        self.assertIs(self.place.user, self.user)
+        self.assertEqual(self.place.amenities, [self.amenity])
+        self.assertEqual(self.amenity.places, [self.place])
+        self.assertEqual(self.place.reviews, [self.review])
+        self.assertEqual(self.user.reviews, [self.review])
+        self.assertIs(self.review.place, self.place)
+        self.assertIsNone(City().state)
+
+    def test_accessors_use_the_index(self):
+        """Test that referrer lookups after the first do not scan the store."""
+        self.assertEqual(self.place.reviews, [self.review])
+        self.assertEqual(self.amenity.places, [self.place])
+        with patch.object(FileStorage, "all", side_effect=AssertionError):
+            review = Review()
+            review.place_id = self.place.id
+            self.assertEqual(self.place.reviews, [self.review, review])
+            self.assertEqual(self.amenity.places, [self.place])
+
+    def test_save_reindexes_lists_changed_in_place(self):
+        """Test that save() re-indexes a list appended to in place."""
+        self.assertEqual(self.amenity.places, [self.place])
+        other = Amenity()
+        self.place.amenity_ids.append(other.id)
+        self.place.save()
+        self.assertEqual(other.places, [self.place])
+        self.assertEqual(self.amenity.places, [self.place])
+
+    def test_dependents_and_tree(self):
+        """Test that cascades follow the cascade relations only."""
+        self.assertEqual({id(obj) for obj in dependents(self.state)},
+                         {id(self.city), id(self.place), id(self.review)})
+        self.assertEqual(dependents(self.amenity), [])
+        result = tree(self.state, 2)
+        self.assertEqual(result["cities"][0]["id"], self.city.id)
+        self.assertEqual(result["cities"][0]["places"][0]["id"], self.place.id)
+        self.assertNotIn("reviews", result["cities"][0]["places"][0])
+        self.assertNotIn("cities", tree(self.state, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()